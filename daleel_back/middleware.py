@@ -0,0 +1,150 @@
+import logging
+import os
+import re
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+
+import django
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    # Max queries per request; None disables the check.
+    'DEFAULT_BUDGET': 50,
+    # Per-endpoint overrides keyed by URL name, e.g. {'product-list': 5}.
+    'BUDGETS': {},
+    # A query shape repeated this many times in one request is reported as N+1.
+    'N_PLUS_ONE_THRESHOLD': 5,
+    # Raise QueryBudgetExceeded instead of logging a warning.
+    'RAISE': False,
+    # Add an X-Query-Count header to every response.
+    'HEADER': True,
+}
+
+IN_CLAUSE = re.compile(r'IN \((?:%s, )*%s\)')
+WHITESPACE = re.compile(r'\s+')
+PROJECT_ROOT = str(settings.BASE_DIR)
+DJANGO_ROOT = os.path.dirname(django.__file__)
+ENTRY_POINTS = {
+    os.path.join(PROJECT_ROOT, 'manage.py'),
+    os.path.join(PROJECT_ROOT, 'daleel_back', 'wsgi.py'),
+    os.path.join(PROJECT_ROOT, 'daleel_back', 'asgi.py'),
+}
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'QUERY_INSPECTOR', {}))
+    return config
+
+
+def query_shape(sql):
+    """
+    Reduce a SQL string to its shape: parameters are already placeholders,
+    so only collapse IN lists of varying length and whitespace.
+    """
+    return WHITESPACE.sub(' ', IN_CLAUSE.sub('IN (...)', sql)).strip()
+
+
+def caller_location():
+    """
+    Where a query came from: the innermost frame in project code or, when the
+    query is issued by a library on our behalf (e.g. a serializer field), the
+    innermost frame outside Django itself.
+    """
+    fallback = None
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        filename = frame.filename
+        if filename.startswith(DJANGO_ROOT) or filename == __file__:
+            continue
+        if filename.startswith(PROJECT_ROOT) and 'site-packages' not in filename:
+            if filename not in ENTRY_POINTS:
+                return f'{filename[len(PROJECT_ROOT) + 1:]}:{frame.lineno} in {frame.name}'
+        elif fallback is None:
+            fallback = f'{filename}:{frame.lineno} in {frame.name}'
+    return fallback or 'unknown'
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper that counts queries and groups them by shape.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.shapes = Counter()
+        self.locations = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        shape = query_shape(sql)
+        self.shapes[shape] += 1
+        if shape not in self.locations:
+            self.locations[shape] = caller_location()
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold):
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+class QueryInspectorMiddleware:
+    """
+    Counts SQL queries per request, reports repeated query shapes (N+1
+    patterns) and enforces a per-endpoint query budget.
+
+    Configured through the ``QUERY_INSPECTOR`` setting; meant for development
+    and staging rather than production traffic.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = get_config()
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        if self.config['HEADER']:
+            response['X-Query-Count'] = str(recorder.count)
+        self.inspect(request, recorder)
+        return response
+
+    def get_view_name(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return request.path
+        return match.view_name or match._func_path
+
+    def inspect(self, request, recorder):
+        view_name = self.get_view_name(request)
+        problems = []
+
+        for shape, count in recorder.repeated(self.config['N_PLUS_ONE_THRESHOLD']):
+            problems.append(
+                f'possible N+1: {count} queries from {recorder.locations[shape]}: {shape[:200]}'
+            )
+
+        budget = self.config['BUDGETS'].get(view_name, self.config['DEFAULT_BUDGET'])
+        if budget is not None and recorder.count > budget:
+            problems.append(f'{recorder.count} queries exceed the budget of {budget}')
+
+        if not problems:
+            return
+        message = f'{request.method} {request.path} ({view_name}): ' + '; '.join(problems)
+        if self.config['RAISE']:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -63,6 +63,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'daleel_back.middleware.QueryInspectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -112,6 +113,39 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10,  # Number of items per page
 }
 
+# Per-request SQL query counting and N+1 detection (see daleel_back/middleware.py)
+QUERY_INSPECTOR = {
+    'ENABLED': DEBUG,
+    'DEFAULT_BUDGET': 50,
+    'BUDGETS': {},  # e.g. {'product-list': 5}
+    'N_PLUS_ONE_THRESHOLD': 5,
+    'RAISE': False,
+}
+
+
+# Shared by every worker process on the host, so the catalog generation
+# counter (and anything else invalidated through the cache) is seen by all of
+# them. Point several hosts at Redis/Memcached or the database cache instead.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', str(BASE_DIR / 'var' / 'cache')),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+# Upper bound for catalog listing cache entries; writes invalidate them sooner.
+CATALOG_CACHE_TIMEOUT = 600
+
+# Seconds a process trusts its category snapshot before re-checking the table.
+CATEGORY_REGISTRY_CHECK_INTERVAL = 5
+
+# Seconds a cart holds the units added to it before they are released.
+CART_RESERVATION_TTL = 15 * 60
+
+# Seconds a stored Idempotency-Key response is replayed for retries.
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+# Seconds a request may hold an Idempotency-Key before a retry may take it over.
+IDEMPOTENCY_KEY_LEASE = 60
 
 
 # Password validation
@@ -148,12 +182,31 @@ SIMPLE_JWT = {
 
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 # Media
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads are stored by content hash (see store/storage.py). Django >= 5.1
+# ignores STATICFILES_STORAGE, so static files keep the storage they were
+# already collected with.
+STORAGES = {
+    'default': {
+        'BACKEND': 'store.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Resized WebP copies of product images (see store/images.py)
+PRODUCT_IMAGE_VARIANTS = {
+    'WIDTHS': [200, 400, 800],
+    'QUALITY': 80,
+    'WORKERS': 2,
+    'ASYNC': True,
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -1,13 +1,14 @@
 from django.contrib import admin
-from django.urls import path,include
+from django.urls import path,include,re_path
 from django.conf.urls.static import static
 from daleel_back import settings
+from daleel_back.media import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('client.urls')),  
-    path('',include('store.urls'))
+    path('',include('store.urls')),
+    re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), serve_media, name='media'),
 ]
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
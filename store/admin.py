@@ -1,15 +1,54 @@
+from django import forms
 from django.contrib import admin
+from django.forms.models import ModelChoiceIterator
 from .models import * 
+from .registry import category_registry
+
+
+class RegistryCategoryChoiceIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for category in category_registry.categories():
+            yield self.choice(category)
+
+    def __len__(self):
+        return len(category_registry.categories()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(category_registry.categories())
+
+
+class RegistryCategoryChoiceField(forms.ModelChoiceField):
+    """
+    Category select whose options and validation come from the category
+    registry instead of a query per form render and submit.
+    """
+    iterator = RegistryCategoryChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        category = category_registry.get(value)
+        if category is None:
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+        return category
+
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ['title', 'vendor', 'category', 'price', 'sold_count', 'created_at']
     list_filter = ['vendor', 'category']
+    list_select_related = ['vendor', 'category']
 
-    def formfield_for_choice_field(self, db_field, request, **kwargs):
-        if db_field.name == "category":
-            kwargs['choices'] = get_category_choices()
-        return super().formfield_for_choice_field(db_field, request, **kwargs)
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'category':
+            kwargs['form_class'] = RegistryCategoryChoiceField
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
     
     
 @admin.register(Category)
@@ -38,3 +77,17 @@ class OrderItemAdmin(admin.ModelAdmin):
     get_total_price.short_description = 'Total Price'
 
 admin.site.register(Checkout)
+
+
+@admin.register(VendorSalesRollup)
+class VendorSalesRollupAdmin(admin.ModelAdmin):
+    list_display = ['day', 'vendor', 'product', 'revenue', 'units', 'orders']
+    list_filter = ['day']
+    list_select_related = ['vendor', 'product']
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ['key', 'user', 'status_code', 'created_at', 'expires_at']
+    search_fields = ['key']
+    list_select_related = ['user']
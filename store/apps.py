@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_index(sender, using, **kwargs):
+    from django.db import connections
+    from .search import FTS_TABLE, install_product_index
+
+    # Table remakes during migrate drop the sync triggers; put them back once
+    # the index itself exists.
+    connection = connections[using]
+    if FTS_TABLE in connection.introspection.table_names():
+        install_product_index(connection)
 
 
 class StoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "store"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(ensure_search_index, sender=self)
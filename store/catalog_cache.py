@@ -0,0 +1,83 @@
+"""
+Response cache for public catalog listings.
+
+Entries are keyed on the view, the normalized query string and a catalog
+generation number. Any ``Product`` or ``Category`` write bumps the
+generation, which makes every older entry unreachable at once; the timeout
+only bounds how long unreachable entries linger in the backend. The
+generation lives in the shared ``default`` cache, so a write handled by one
+worker process invalidates the listings cached by all of them.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import urlencode
+
+KEY_PREFIX = 'store:catalog'
+GENERATION_KEY = f'{KEY_PREFIX}:generation'
+HITS_KEY = f'{KEY_PREFIX}:hits'
+MISSES_KEY = f'{KEY_PREFIX}:misses'
+
+
+def _incr(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Missing key (first use or evicted). Start from the clock so a
+        # reset generation never collides with one used before.
+        value = time.time_ns() if key == GENERATION_KEY else 1
+        cache.set(key, value, timeout=None)
+        return value
+
+
+class CatalogCache:
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 600)
+
+    def generation(self):
+        return cache.get_or_set(GENERATION_KEY, time.time_ns, timeout=None)
+
+    def bump_generation(self):
+        """
+        Invalidate every cached listing, now and again once the current
+        transaction commits (so nothing cached in between survives).
+        """
+        _incr(GENERATION_KEY)
+        transaction.on_commit(lambda: _incr(GENERATION_KEY))
+
+    def make_key(self, name, request):
+        params = sorted((key, values) for key, values in request.query_params.lists())
+        normalized = f'{request.scheme}://{request.get_host()}{request.path}?{urlencode(params, doseq=True)}'
+        digest = hashlib.md5(normalized.encode('utf-8'), usedforsecurity=False).hexdigest()
+        return f'{KEY_PREFIX}:{name}:{self.generation()}:{digest}'
+
+    def get(self, key):
+        entry = cache.get(key)
+        _incr(HITS_KEY if entry is not None else MISSES_KEY)
+        return entry
+
+    def set(self, key, entry):
+        """
+        Store under a key made *before* the response was computed, so a write
+        that lands meanwhile leaves this entry under the old generation.
+        """
+        cache.set(key, entry, timeout=self.timeout)
+
+    def stats(self):
+        hits = cache.get(HITS_KEY, 0)
+        misses = cache.get(MISSES_KEY, 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else None,
+            'generation': self.generation(),
+        }
+
+
+catalog_cache = CatalogCache()
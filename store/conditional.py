@@ -0,0 +1,53 @@
+"""
+Helpers for answering conditional GETs (``If-None-Match`` /
+``If-Modified-Since``) from cheap validators, before anything is serialized.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """
+    Strong ETag from anything the representation depends on.
+    """
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode('utf-8'), usedforsecurity=False)
+    return quote_etag(digest.hexdigest())
+
+
+def queryset_validators(queryset, *parts):
+    """
+    ``(etag, last_modified)`` for a list: the newest ``updated_at`` plus the
+    row count (so deletions change the ETag), in one aggregate query.
+    """
+    stats = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+    return make_etag(stats['count'], stats['last_modified'], *parts), stats['last_modified']
+
+
+def rows_validators(rows, *parts):
+    """
+    ``(etag, last_modified)`` for an already fetched page of rows, from their
+    ids and ``updated_at``, without another query.
+    """
+    last_modified = max((row.updated_at for row in rows), default=None)
+    return make_etag(*[(row.pk, row.updated_at) for row in rows], *parts), last_modified
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    A ``304 Not Modified`` response if the client's copy is current, else None.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
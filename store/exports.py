@@ -0,0 +1,82 @@
+"""
+Streaming exports of a vendor's catalog.
+
+Rows are read with ``values_list().iterator()`` in fixed-size chunks and
+written straight into a ``StreamingHttpResponse``, so no model instances are
+built and memory use stays flat however many products a vendor has.
+"""
+import csv
+import json
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+CHUNK_SIZE = 2000
+EXPORT_FIELDS = [
+    ('id', 'id'),
+    ('title', 'title'),
+    ('category', 'category_id'),
+    ('category_name', 'category__name'),
+    ('description', 'description'),
+    ('stock', 'stock'),
+    ('price', 'price'),
+    ('sold_count', 'sold_count'),
+    ('image', 'image'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """
+    File-like object whose ``write`` hands the line back to the caller,
+    so ``csv.writer`` can feed a generator.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_products(queryset, request=None, chunk_size=CHUNK_SIZE):
+    """
+    Yield one dict per product, in id order, without building model instances.
+    """
+    names = [name for name, _ in EXPORT_FIELDS]
+    rows = queryset.order_by('id').values_list(*[lookup for _, lookup in EXPORT_FIELDS])
+    for row in rows.iterator(chunk_size=chunk_size):
+        data = dict(zip(names, row))
+        if data['image']:
+            url = default_storage.url(data['image'])
+            data['image'] = request.build_absolute_uri(url) if request else url
+        yield data
+
+
+def csv_lines(products):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in EXPORT_FIELDS])
+    for data in products:
+        yield writer.writerow(['' if value is None else value for value in data.values()])
+
+
+def ndjson_lines(products):
+    for data in products:
+        yield json.dumps(data, cls=DjangoJSONEncoder) + '\n'
+
+
+def stream_products(queryset, export_format, request=None, filename='products'):
+    """
+    ``StreamingHttpResponse`` with the products of ``queryset`` as CSV or NDJSON.
+    """
+    products = iter_products(queryset, request)
+    lines = csv_lines(products) if export_format == 'csv' else ndjson_lines(products)
+    response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES[export_format])
+    stamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+    response['Content-Disposition'] = f'attachment; filename="{filename}-{stamp}.{export_format}"'
+    response['Cache-Control'] = 'no-store'
+    return response
@@ -0,0 +1,51 @@
+import django_filters
+
+from .models import Category, Checkout, Product
+from .registry import category_registry
+
+
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    pass
+
+
+class ProductFilter(django_filters.FilterSet):
+    """
+    Filters for the product listing. ``category`` takes one or more
+    comma-separated ids; ``category_tree`` takes a category id and matches
+    products in that category or any of its subcategories.
+    """
+    category = NumberInFilter(field_name='category', lookup_expr='in')
+    category_tree = django_filters.NumberFilter(method='filter_category_tree')
+    min_price = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
+    in_stock = django_filters.BooleanFilter(method='filter_in_stock')
+    vendor = django_filters.NumberFilter(field_name='vendor')
+    created_after = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='gte')
+
+    class Meta:
+        model = Product
+        fields = ['id', 'category', 'vendor']
+
+    def filter_in_stock(self, queryset, name, value):
+        return queryset.filter(stock__gt=0) if value else queryset.filter(stock=0)
+
+    def filter_category_tree(self, queryset, name, value):
+        category = category_registry.get(value)
+        if category is None:
+            return queryset.none()
+        lower, upper = Category.subtree_bounds(category.path)
+        return queryset.filter(category__path__gte=lower, category__path__lt=upper)
+
+
+class CheckoutFilter(django_filters.FilterSet):
+    """
+    ``payment_status`` takes one or more comma-separated statuses;
+    ``created_after`` / ``created_before`` bound the checkout time.
+    """
+    payment_status = django_filters.BaseInFilter(field_name='payment_status', lookup_expr='in')
+    created_after = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='lte')
+
+    class Meta:
+        model = Checkout
+        fields = ['payment_status']
@@ -0,0 +1,213 @@
+"""
+``Idempotency-Key`` support for mutating API views.
+
+A client that sends ``Idempotency-Key: <key>`` with a write gets the first
+response stored as rendered bytes (per user and key) and replayed verbatim
+for every retry until ``IDEMPOTENCY_KEY_TTL`` seconds have passed; the view
+itself only runs once. Reusing a key for a different request is rejected with
+422, and a retry that arrives while the first request is still running gets
+409. A request holds its key only for ``IDEMPOTENCY_KEY_LEASE`` seconds, so
+the claim of a worker that died mid-request is taken over by the next retry.
+"""
+import datetime
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+SWEEP_BATCH_SIZE = 1000
+SWEEP_INTERVAL = 5 * 60
+SWEEP_LOCK_KEY = 'store:idempotency:sweep'
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+class IdempotencyKeyInvalid(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters.'
+    default_code = 'idempotency_key_invalid'
+
+
+class IdempotencyKeyInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is still being processed.'
+    default_code = 'idempotency_key_in_progress'
+
+
+class IdempotencyKeyMismatch(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'This Idempotency-Key was already used for a different request.'
+    default_code = 'idempotency_key_mismatch'
+
+
+class IdempotentReplay(Exception):
+    """
+    Raised from ``initial()`` to skip the handler and replay ``record``.
+    """
+
+    def __init__(self, record):
+        self.record = record
+
+
+def key_ttl():
+    return datetime.timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+
+def key_lease():
+    return datetime.timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_LEASE', 60))
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='idempotency-sweep')
+    return _executor
+
+
+def request_fingerprint(request):
+    digest = hashlib.sha256()
+    digest.update(request.method.encode('ascii'))
+    digest.update(b'\0')
+    digest.update(request.get_full_path().encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def purge_expired_keys(batch_size=SWEEP_BATCH_SIZE, max_batches=None):
+    """
+    Delete expired keys ``batch_size`` rows at a time. Returns the number deleted.
+    """
+    now = timezone.now()
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=now)
+            .order_by()
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        deleted += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
+        batches += 1
+    return deleted
+
+
+def purge_in_background():
+    try:
+        purge_expired_keys(max_batches=1)
+    except Exception:
+        logger.exception("Could not purge expired idempotency keys")
+    finally:
+        connection.close()
+
+
+def maybe_purge_expired_keys():
+    """
+    Purge one batch of expired keys on a background thread, at most every
+    ``SWEEP_INTERVAL`` seconds; the ``purge_idempotency_keys`` command does
+    a full sweep.
+    """
+    if cache.add(SWEEP_LOCK_KEY, True, timeout=SWEEP_INTERVAL):
+        get_executor().submit(purge_in_background)
+
+
+class IdempotentMixin:
+    """
+    Makes a view's writes safe to retry with an ``Idempotency-Key`` header.
+    Requests without the header are handled exactly as before.
+    """
+    idempotent_methods = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.idempotency_record = None
+        key = request.headers.get(HEADER)
+        if key is None or request.method not in self.idempotent_methods:
+            return
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise IdempotencyKeyInvalid()
+
+        fingerprint = request_fingerprint(request)
+        while True:
+            try:
+                with transaction.atomic():
+                    self.idempotency_record = IdempotencyKey.objects.create(
+                        user=request.user,
+                        key=key,
+                        request_hash=fingerprint,
+                        expires_at=timezone.now() + key_lease(),
+                    )
+                maybe_purge_expired_keys()
+                return
+            except IntegrityError:
+                pass
+            try:
+                record = IdempotencyKey.objects.get(user=request.user, key=key)
+            except IdempotencyKey.DoesNotExist:
+                continue  # Deleted meanwhile; claim it again.
+            now = timezone.now()
+            if record.expires_at <= now:
+                # An expired response, or the claim of a request that never
+                # finished; only delete it if nobody took it over meanwhile.
+                IdempotencyKey.objects.filter(pk=record.pk, expires_at__lte=now).delete()
+                continue
+            if record.request_hash != fingerprint:
+                raise IdempotencyKeyMismatch()
+            if record.status_code is None:
+                raise IdempotencyKeyInProgress()
+            raise IdempotentReplay(record)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, IdempotentReplay):
+            record = exc.record
+            response = HttpResponse(
+                bytes(record.response_body or b''),
+                status=record.status_code,
+                content_type=record.content_type or None,
+            )
+            response['Idempotent-Replayed'] = 'true'
+            return response
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            # Unhandled errors never reach finalize_response; free the key.
+            record = getattr(self, 'idempotency_record', None)
+            if record is not None:
+                IdempotencyKey.objects.filter(pk=record.pk).delete()
+                self.idempotency_record = None
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        record = getattr(self, 'idempotency_record', None)
+        if record is not None:
+            self.idempotency_record = None
+            if response.status_code >= 500 or not isinstance(response, Response):
+                # Let the client retry a failure for real.
+                IdempotencyKey.objects.filter(pk=record.pk).delete()
+            else:
+                # Render now so retries get exactly these bytes back.
+                response.render()
+                IdempotencyKey.objects.filter(pk=record.pk, status_code__isnull=True).update(
+                    status_code=response.status_code,
+                    content_type=response.get('Content-Type', ''),
+                    response_body=response.content,
+                    expires_at=timezone.now() + key_ttl(),
+                )
+        return response
@@ -0,0 +1,122 @@
+"""
+Resized WebP derivatives of product images.
+
+Derivatives are generated off the request path on a small thread pool once
+the transaction that saved the product commits, and recorded on
+``Product.image_variants`` as ``{"<width>": "<storage name>"}``.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'WIDTHS': [200, 400, 800],
+    'QUALITY': 80,
+    'WORKERS': 2,
+    # Generate in the background; set to False to generate inline.
+    'ASYNC': True,
+}
+
+_executor = None
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'PRODUCT_IMAGE_VARIANTS', {}))
+    return config
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_config()['WORKERS'], thread_name_prefix='image-variants'
+        )
+    return _executor
+
+
+def generate_variants(image_name):
+    """
+    Write one WebP per configured width (never upscaled) and return the
+    ``{width: storage name}`` map.
+    """
+    config = get_config()
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    variants = {}
+    with default_storage.open(image_name, 'rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+
+    for width in sorted(set(config['WIDTHS'])):
+        if width > original.width and variants:
+            break
+        resized = original.copy()
+        resized.thumbnail((width, original.height), Image.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, format='WEBP', quality=config['QUALITY'], method=4)
+        name = default_storage.save(f'products/variants/{stem}_{width}w.webp', ContentFile(buffer.getvalue()))
+        variants[str(width)] = name
+    return variants
+
+
+def build_product_variants(product_id, image_name):
+    """
+    Generate derivatives and attach them to the product, unless its image
+    was replaced in the meantime.
+    """
+    from .catalog_cache import catalog_cache
+    from .models import Product
+
+    try:
+        variants = generate_variants(image_name)
+        updated = Product.objects.filter(pk=product_id, image=image_name).update(
+            image_variants=variants, updated_at=timezone.now()
+        )
+        if updated:
+            catalog_cache.bump_generation()
+    except Exception:
+        logger.exception("Could not build image variants for product %s", product_id)
+    finally:
+        if get_config()['ASYNC']:
+            connection.close()
+
+
+def schedule_image_variants(product):
+    """
+    Queue derivative generation for ``product.image`` after the current
+    transaction commits.
+    """
+    if not product.image:
+        return
+    product_id, image_name = product.pk, product.image.name
+
+    def submit():
+        if get_config()['ASYNC']:
+            get_executor().submit(build_product_variants, product_id, image_name)
+        else:
+            build_product_variants(product_id, image_name)
+
+    transaction.on_commit(submit)
+
+
+def variant_urls(product, request=None):
+    """
+    ``{width: url}`` for the product's derivatives; empty until they exist.
+    """
+    urls = {}
+    for width, name in (product.image_variants or {}).items():
+        url = default_storage.url(name)
+        urls[width] = request.build_absolute_uri(url) if request else url
+    return urls
@@ -0,0 +1,117 @@
+"""
+Streaming bulk import of products from CSV or JSON Lines.
+
+Rows are read one at a time, validated with ``ProductCreateSerializer`` and
+written with ``bulk_create`` in fixed-size batches, each in its own
+transaction, so memory use does not grow with the size of the file.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import transaction
+
+from .catalog_cache import catalog_cache
+from .models import Product
+from .serializers import ProductCreateSerializer
+
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+FORMATS = {
+    'csv': 'csv',
+    'jsonl': 'jsonl',
+    'ndjson': 'jsonl',
+    'json': 'jsonl',
+}
+
+
+class ImportReport:
+
+    def __init__(self, max_errors=MAX_REPORTED_ERRORS):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def add_error(self, row, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': row, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def detect_format(filename, requested=None):
+    """
+    ``'csv'`` or ``'jsonl'`` from an explicit format or the file extension.
+    """
+    key = (requested or filename.rsplit('.', 1)[-1]).lower()
+    return FORMATS.get(key)
+
+
+def iter_rows(fileobj, file_format):
+    """
+    Yield ``(row number, data or None, error or None)`` from a binary file.
+    """
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        if file_format == 'csv':
+            reader = csv.DictReader(text)
+            for data in reader:
+                yield reader.line_num, data, None
+        else:
+            for number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except ValueError as exc:
+                    yield number, None, {'non_field_errors': [f'Invalid JSON: {exc}']}
+                    continue
+                if not isinstance(data, dict):
+                    yield number, None, {'non_field_errors': ['Each line must be a JSON object.']}
+                    continue
+                yield number, data, None
+    except UnicodeDecodeError:
+        yield None, None, {'non_field_errors': ['File must be UTF-8 encoded.']}
+    finally:
+        # Leave the underlying upload open for its owner to close.
+        text.detach()
+
+
+def import_products(fileobj, file_format, vendor, batch_size=BATCH_SIZE):
+    """
+    Create products for ``vendor`` from ``fileobj`` and return an ``ImportReport``.
+    """
+    report = ImportReport()
+    rows = iter_rows(fileobj, file_format)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        products = []
+        for number, data, error in batch:
+            if error:
+                report.add_error(number, error)
+                continue
+            serializer = ProductCreateSerializer(data=data)
+            if serializer.is_valid():
+                products.append(Product(vendor=vendor, **serializer.validated_data))
+            else:
+                report.add_error(number, serializer.errors)
+        if products:
+            with transaction.atomic():
+                Product.objects.bulk_create(products, batch_size=batch_size)
+            report.created += len(products)
+
+    if report.created:
+        # bulk_create sends no post_save signals.
+        catalog_cache.bump_generation()
+    return report
@@ -0,0 +1,76 @@
+"""
+Stock bookkeeping for checkout.
+
+Stock is taken with a single conditional ``UPDATE`` covering every product
+(``... SET stock = stock - n WHERE id IN (...) AND stock >= n``, with ``n``
+picked per row by a ``CASE``), so the database checks and decrements each row
+atomically: concurrent checkouts on the same product only wait on those rows
+and can never push stock below zero. Units held by other carts' live
+reservations are left alone, and the checked-out carts' own reservations are
+released once their stock is taken.
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from .catalog_cache import catalog_cache
+from .models import OrderItem, Product, StockReservation
+from .reservations import reserved_elsewhere, with_available_stock
+
+
+class InsufficientStock(Exception):
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        super().__init__(f"Insufficient stock for products {[item['product_id'] for item in shortages]}")
+
+
+def take_stock(orders):
+    """
+    Decrement ``stock`` and increment ``sold_count`` for every product in
+    ``orders``. Must run inside a transaction: on any shortage it leaves
+    every product as it was and raises ``InsufficientStock`` listing each
+    short one.
+    """
+    quantities = dict(
+        OrderItem.objects.filter(order__in=orders)
+        .values('product_id')
+        .annotate(quantity=Sum('quantity'))
+        .order_by('product_id')
+        .values_list('product_id', 'quantity')
+    )
+    now = timezone.now()
+    if quantities:
+        # One statement for every product: each row is only touched if it
+        # still has the units, so a short row is simply left out.
+        quantity = Case(
+            *[When(pk=product_id, then=Value(amount)) for product_id, amount in quantities.items()],
+            output_field=IntegerField(),
+        )
+        needed = reserved_elsewhere(orders, now) + quantity
+        savepoint = transaction.savepoint()
+        updated = Product.objects.filter(pk__in=quantities, stock__gte=needed).update(
+            stock=F('stock') - quantity,
+            sold_count=F('sold_count') + quantity,
+            updated_at=now,
+        )
+        if updated != len(quantities):
+            # Undo the rows that were taken so the shortage check sees the
+            # original stock.
+            transaction.savepoint_rollback(savepoint)
+            short = dict(
+                with_available_stock(
+                    Product.objects.filter(pk__in=quantities, stock__lt=needed), exclude_orders=orders
+                ).values_list('id', 'available_stock')
+            )
+            raise InsufficientStock([
+                {'product_id': product_id, 'requested': quantities[product_id], 'available': available}
+                for product_id, available in sorted(short.items())
+            ])
+        transaction.savepoint_commit(savepoint)
+
+    StockReservation.objects.filter(order__in=orders).delete()
+    if quantities:
+        # Queryset.update sends no post_save signals.
+        catalog_cache.bump_generation()
+    return quantities
@@ -0,0 +1,32 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from client.models import Vendor
+from store.importer import BATCH_SIZE, detect_format, import_products
+
+
+class Command(BaseCommand):
+    help = "Bulk import products for a vendor from a CSV or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSONL file to import.")
+        parser.add_argument("--vendor", required=True, help="Username of the owning vendor.")
+        parser.add_argument("--format", dest="file_format", choices=["csv", "jsonl"], help="Override format detection.")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            vendor = Vendor.objects.get(username=options["vendor"])
+        except Vendor.DoesNotExist:
+            raise CommandError(f"Vendor \"{options['vendor']}\" does not exist.")
+        file_format = detect_format(options["path"], options["file_format"])
+        if not file_format:
+            raise CommandError("Unsupported file format; use --format csv or --format jsonl.")
+
+        with open(options["path"], "rb") as f:
+            report = import_products(f, file_format, vendor, batch_size=options["batch_size"])
+
+        for error in report.errors:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(f"Created {report.created} products, {report.failed} rows failed."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from store.idempotency import SWEEP_BATCH_SIZE, purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = "Delete expired Idempotency-Key records."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=SWEEP_BATCH_SIZE, help="Rows deleted per statement.")
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys(batch_size=max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.search import rebuild_product_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for products."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default", help="Database alias to rebuild.")
+
+    def handle(self, *args, **options):
+        if not rebuild_product_index(options["database"]):
+            raise CommandError("Full-text search is only available on SQLite databases.")
+        self.stdout.write(self.style.SUCCESS("Product search index rebuilt."))
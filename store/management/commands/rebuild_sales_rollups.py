@@ -0,0 +1,31 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from client.models import Vendor
+from store.rollups import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute vendor sales rollups from checked-out orders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--vendor", type=int, help="Only rebuild this vendor's rows (id).")
+        parser.add_argument("--since", help="Only rebuild days on or after this date (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        vendor = None
+        if options["vendor"] is not None:
+            try:
+                vendor = Vendor.objects.get(pk=options["vendor"])
+            except Vendor.DoesNotExist:
+                raise CommandError(f"Vendor {options['vendor']} does not exist.")
+        since = None
+        if options["since"]:
+            try:
+                since = datetime.date.fromisoformat(options["since"])
+            except ValueError:
+                raise CommandError("--since must be a date in YYYY-MM-DD format.")
+
+        written = rebuild_sales_rollups(vendor=vendor, since=since)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} rollup rows."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from store.reservations import SWEEP_BATCH_SIZE, sweep_expired_reservations
+
+
+class Command(BaseCommand):
+    help = "Delete expired cart stock reservations."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=SWEEP_BATCH_SIZE, help="Rows deleted per statement.")
+
+    def handle(self, *args, **options):
+        deleted = sweep_expired_reservations(batch_size=max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired reservations."))
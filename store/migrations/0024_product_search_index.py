@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    from store.search import install_product_index, rebuild_product_index
+
+    install_product_index(schema_editor.connection)
+    rebuild_product_index(schema_editor.connection.alias)
+
+
+def drop_index(apps, schema_editor):
+    from store.search import uninstall_product_index
+
+    uninstall_product_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0023_alter_order_status"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:58
+
+from django.db import migrations, models
+
+
+def backfill_paths(apps, schema_editor):
+    Category = apps.get_model("store", "Category")
+    categories = list(Category.objects.only("id", "parent_id"))
+    parents = {category.id: category.parent_id for category in categories}
+    paths = {}
+
+    def path_for(category_id):
+        if category_id not in paths:
+            parent_id = parents[category_id]
+            prefix = path_for(parent_id) if parent_id else ""
+            paths[category_id] = f"{prefix}{category_id}/"
+        return paths[category_id]
+
+    for category in categories:
+        category.path = path_for(category.id)
+        category.depth = category.path.count("/") - 1
+    Category.objects.bulk_update(categories, ["path", "depth"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0024_product_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="depth",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="path",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=255
+            ),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
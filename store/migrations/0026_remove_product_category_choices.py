@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0025_category_path"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="product",
+            name="category",
+            field=models.CharField(max_length=10),
+        ),
+    ]
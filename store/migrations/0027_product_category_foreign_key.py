@@ -0,0 +1,87 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_categories(apps, schema_editor):
+    """
+    Point every product at the Category its lower-cased name refers to.
+    Names were stored in a 10 character column, so truncated names match too;
+    names with no Category at all get a new top-level Category.
+    """
+    Category = apps.get_model("store", "Category")
+    Product = apps.get_model("store", "Product")
+
+    by_name = {}
+    for category in Category.objects.order_by("-id"):
+        by_name[category.name.lower()[:10]] = category.id
+    for category in Category.objects.order_by("-id"):
+        by_name[category.name.lower()] = category.id
+
+    names = (
+        Product.objects.exclude(category="")
+        .values_list("category", flat=True)
+        .distinct()
+    )
+    for name in names:
+        category_id = by_name.get(name.lower())
+        if category_id is None:
+            category = Category.objects.create(name=name)
+            Category.objects.filter(pk=category.pk).update(path=f"{category.pk}/", depth=0)
+            category_id = by_name[name.lower()] = category.pk
+        Product.objects.filter(category=name).update(category_ref=category_id)
+
+
+def unlink_categories(apps, schema_editor):
+    Category = apps.get_model("store", "Category")
+    Product = apps.get_model("store", "Product")
+    for category in Category.objects.all():
+        Product.objects.filter(category_ref=category.pk).update(
+            category=category.name.lower()[:10]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0026_remove_product_category_choices"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="category_ref",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="store.category",
+            ),
+        ),
+        migrations.RunPython(link_categories, unlink_categories),
+        # A default lets the old column be re-added when unapplying.
+        migrations.AlterField(
+            model_name="product",
+            name="category",
+            field=models.CharField(default="", max_length=10),
+        ),
+        migrations.RemoveField(
+            model_name="product",
+            name="category",
+        ),
+        migrations.RenameField(
+            model_name="product",
+            old_name="category_ref",
+            new_name="category",
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="category",
+            field=models.ForeignKey(
+                help_text="The category this product is listed under",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="products",
+                to="store.category",
+            ),
+        ),
+    ]
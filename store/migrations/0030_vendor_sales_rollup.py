@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("client", "0001_initial"),
+        ("store", "0029_product_listing_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VendorSalesRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField()),
+                ("revenue", models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ("units", models.PositiveIntegerField(default=0)),
+                ("orders", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("product", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="sales_rollups", to="store.product")),
+                ("vendor", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="sales_rollups", to="client.vendor")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["vendor", "day"], name="vendor_sales_rollup_day_idx")],
+                "constraints": [models.UniqueConstraint(fields=("vendor", "product", "day"), name="vendor_sales_rollup_unique")],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0030_vendor_sales_rollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockReservation",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("quantity", models.PositiveIntegerField()),
+                ("expires_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("order", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="reservations", to="store.order")),
+                ("product", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="reservations", to="store.product")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["product", "expires_at"], name="stock_reservation_live_idx"), models.Index(fields=["expires_at"], name="stock_reservation_expiry_idx")],
+                "constraints": [models.UniqueConstraint(fields=("order", "product"), name="stock_reservation_order_product_unique")],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:17
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def update_total(Order, OrderItem, order_id):
+    total = sum(
+        item.quantity * item.price for item in OrderItem.objects.filter(order_id=order_id)
+    )
+    Order.objects.filter(pk=order_id).update(total_price=total)
+
+
+def merge_duplicates(apps, schema_editor):
+    """
+    Fold each user's extra CART orders into their oldest one, then merge
+    repeated (order, product) lines by summing their quantities.
+    """
+    Order = apps.get_model("store", "Order")
+    OrderItem = apps.get_model("store", "OrderItem")
+    StockReservation = apps.get_model("store", "StockReservation")
+
+    touched = set()
+    users = (
+        Order.objects.filter(status="CART")
+        .values("user")
+        .annotate(carts=Count("id"), keep=Min("id"))
+        .filter(carts__gt=1)
+    )
+    for row in users:
+        strays = Order.objects.filter(user=row["user"], status="CART").exclude(pk=row["keep"])
+        OrderItem.objects.filter(order__in=strays).update(order_id=row["keep"])
+        # Holds are re-taken on the next cart change.
+        StockReservation.objects.filter(order__in=strays).delete()
+        strays.delete()
+        touched.add(row["keep"])
+
+    lines = (
+        OrderItem.objects.values("order", "product")
+        .annotate(lines=Count("id"), keep=Min("id"), quantity=Sum("quantity"))
+        .filter(lines__gt=1)
+    )
+    for row in lines:
+        OrderItem.objects.filter(pk=row["keep"]).update(quantity=row["quantity"])
+        OrderItem.objects.filter(order=row["order"], product=row["product"]).exclude(pk=row["keep"]).delete()
+        StockReservation.objects.filter(order=row["order"], product=row["product"]).delete()
+        touched.add(row["order"])
+
+    for order_id in touched:
+        update_total(Order, OrderItem, order_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("client", "0001_initial"),
+        ("store", "0031_stock_reservation"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="order",
+            constraint=models.UniqueConstraint(condition=models.Q(("status", "CART")), fields=("user",), name="order_one_cart_per_user"),
+        ),
+        migrations.AddConstraint(
+            model_name="orderitem",
+            constraint=models.UniqueConstraint(fields=("order", "product"), name="orderitem_order_product_unique"),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+
+def drop_stored_responses(apps, schema_editor):
+    """
+    Stored responses were serialized data, not rendered bytes; they are
+    short-lived, so drop them rather than converting.
+    """
+    IdempotencyKey = apps.get_model("store", "IdempotencyKey")
+    IdempotencyKey.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0033_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_stored_responses, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="idempotencykey",
+            name="response_body",
+        ),
+        migrations.AddField(
+            model_name="idempotencykey",
+            name="response_body",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="idempotencykey",
+            name="content_type",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -1,4 +1,9 @@
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from decimal import Decimal
+from django.db.models import ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Concat, Substr
+from django.utils import timezone
 from client.models import Vendor,Customer # For Vendor/User association
 from django.utils.translation import gettext_lazy as _
 
@@ -10,6 +15,9 @@ class Category(models.Model):
     parent = models.ForeignKey(
         'self', on_delete=models.CASCADE, related_name="subcategories", null=True, blank=True
     )  # Supports subcategories
+    # Materialized path of ancestor ids, e.g. "1/4/9/"; maintained by save()
+    path = models.CharField(max_length=255, db_index=True, blank=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -21,17 +29,53 @@ class Category(models.Model):
 
     def __str__(self):
         return self.name
-    
-def get_category_choices():
-    """Retrieve all categories as choices for the Product model."""
-    try:
-        return [(category.name.lower(), category.name) for category in Category.objects.all()]
-    except:
-        return [] 
 
-class Product(models.Model):
-    CATEGORY_CHOICES = get_category_choices()
+    @staticmethod
+    def subtree_bounds(path):
+        """
+        Descendants of ``path`` sort in [path, upper): "0" is the character
+        right after "/", so this is an index range scan instead of a LIKE.
+        """
+        return path, path[:-1] + '0'
+
+    def save(self, *args, **kwargs):
+        """
+        Save and keep ``path``/``depth`` of this category and its subtree current.
+        """
+        old_path = self.path
+        parent_path = ''
+        if self.parent_id:
+            # Read the parent's path from the database; a cached parent may be stale.
+            parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).get()
+            if old_path and parent_path.startswith(old_path):
+                raise ValueError("A category cannot be moved under itself or its subcategories.")
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            new_path = f"{parent_path}{self.pk}/"
+            if new_path == old_path:
+                return
+            new_depth = new_path.count('/') - 1
+            depth_change = new_depth - self.depth
+            Category.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+            if old_path:
+                lower, upper = self.subtree_bounds(old_path)
+                Category.objects.filter(path__gt=lower, path__lt=upper).update(
+                    path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                    depth=F('depth') + depth_change,
+                )
+            self.path, self.depth = new_path, new_depth
 
+    def get_descendants(self, include_self=True):
+        """
+        This category's whole subtree in one indexed query.
+        """
+        lower, upper = self.subtree_bounds(self.path)
+        queryset = Category.objects.filter(path__gte=lower, path__lt=upper)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
+    
+class Product(models.Model):
     title = models.CharField(max_length=255)
     vendor = models.ForeignKey(
         Vendor, 
@@ -41,13 +85,30 @@ class Product(models.Model):
     )
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
-    category = models.CharField(max_length=10, choices=CATEGORY_CHOICES)
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='products',
+        help_text="The category this product is listed under"
+    )
     image = models.ImageField(upload_to='products/', null=True, blank=True)
+    # Resized WebP copies of `image` keyed by width; filled in by store.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     sold_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     stock = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            # Listing filters and keyset pagination (ordering field, id)
+            models.Index(fields=['category', 'price'], name='product_category_price_idx'),
+            models.Index(fields=['vendor', 'created_at'], name='product_vendor_created_idx'),
+            models.Index(fields=['price', 'id'], name='product_price_idx'),
+            models.Index(fields=['sold_count', 'id'], name='product_sold_count_idx'),
+        ]
+
     def __str__(self):
         return self.title
     def is_in_stock(self):       
@@ -118,19 +179,61 @@ class Order(models.Model):
 
     def calculate_total_price(self):
         """
-        Calculate and update the total price of the order based on associated OrderItems.
+        Recalculate the total price in the database and refresh it on this instance.
         """
-        total = sum(item.get_total_price() for item in self.order_items.all())
-        self.total_price = total
-        self.save()
+        Order.update_total_price(self.pk)
+        self.refresh_from_db(fields=['total_price', 'updated_at'])
+
+    @staticmethod
+    def total_price_expression():
+        """
+        Sum of the order's item lines, usable in ``update()`` and ``annotate()``.
+        """
+        line_total = ExpressionWrapper(F('quantity') * F('price'), output_field=models.DecimalField(max_digits=10, decimal_places=2))
+        total = (
+            OrderItem.objects.filter(order=OuterRef('pk'))
+            .order_by()
+            .values('order')
+            .annotate(total=Sum(line_total))
+            .values('total')
+        )
+        return Coalesce(Subquery(total, output_field=models.DecimalField(max_digits=10, decimal_places=2)), Value(Decimal('0')))
+
+    @staticmethod
+    def update_total_price(order_id):
+        """
+        Set the order's total to the sum of its items with a single UPDATE,
+        without loading the items or the order.
+        """
+        return Order.objects.filter(pk=order_id).update(
+            total_price=Order.total_price_expression(),
+            updated_at=timezone.now(),
+        )
     @classmethod
     def get_cart(cls, user):
         return cls.objects.filter(user=user, status='CART')
 
+    @classmethod
+    def get_or_create_cart(cls, user):
+        """
+        The user's one open cart. The partial unique constraint makes a
+        concurrent duplicate insert fail, and get_or_create then returns the
+        cart the other request created.
+        """
+        cart, _ = cls.objects.get_or_create(user=user, status='CART')
+        return cart
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Order'
         verbose_name_plural = 'Orders'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=models.Q(status='CART'),
+                name='order_one_cart_per_user',
+            ),
+        ]
 
    
 
@@ -154,6 +257,31 @@ class OrderItem(models.Model):
     class Meta:
         verbose_name = 'Order Item'
         verbose_name_plural = 'Order Items'
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'product'], name='orderitem_order_product_unique'),
+        ]
+
+    @classmethod
+    def add_quantity(cls, order, product, quantity):
+        """
+        Add ``quantity`` of ``product`` to the order's line for it, creating
+        the line if needed, and return the line's new quantity.
+
+        The increment is a single ``UPDATE ... SET quantity = quantity + n``;
+        only when no line exists is one inserted, and if a concurrent request
+        inserted it first the unique constraint turns that into one more
+        increment instead of a duplicate row. Like any queryset write this
+        skips ``save()``, so callers refresh the order total.
+        """
+        lines = cls.objects.filter(order=order, product=product)
+        if not lines.update(quantity=F('quantity') + quantity):
+            try:
+                with transaction.atomic():
+                    cls.objects.bulk_create([cls(order=order, product=product, quantity=quantity, price=product.price)])
+                return quantity
+            except IntegrityError:
+                lines.update(quantity=F('quantity') + quantity)
+        return lines.values_list('quantity', flat=True).get()
 
     def __str__(self):
         return self.product.title
@@ -165,7 +293,71 @@ class OrderItem(models.Model):
         if not self.price:
             self.price = self.product.price
         super().save(*args, **kwargs)
-        self.order.calculate_total_price()
+        self.refresh_order_total()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.refresh_order_total()
+        return result
+
+    def refresh_order_total(self):
+        """
+        Keep the order total in step; refresh the loaded order if there is one.
+        """
+        if OrderItem.order.is_cached(self):
+            self.order.calculate_total_price()
+        else:
+            Order.update_total_price(self.order_id)
+
+class StockReservation(models.Model):
+    """
+    Units of a product held for a cart until ``expires_at``. Available stock
+    is ``stock`` minus the live reservations of other carts (see
+    ``store.reservations``); checkout turns a cart's reservations into a
+    stock decrement.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'product'], name='stock_reservation_order_product_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'expires_at'], name='stock_reservation_live_idx'),
+            models.Index(fields=['expires_at'], name='stock_reservation_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} for order {self.order_id}"
+
+class IdempotencyKey(models.Model):
+    """
+    The first response to a request sent with an ``Idempotency-Key`` header,
+    stored as rendered and replayed to retries of that request until
+    ``expires_at``. A row with no ``status_code`` is a claim by a request
+    still being processed; its ``expires_at`` is a short lease, after which
+    the claim counts as abandoned.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=255, blank=True)
+    response_body = models.BinaryField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_key_user_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.user_id})"
 
 class Checkout(models.Model):
     """
@@ -201,4 +393,28 @@ class Checkout(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def _str_(self):
-        return f"Checkout for Order {self.order.id} - {self.payment_status}"
\ No newline at end of file
+        return f"Checkout for Order {self.order.id} - {self.payment_status}"
+
+class VendorSalesRollup(models.Model):
+    """
+    Pre-aggregated sales per vendor, product and day, maintained at checkout
+    (see ``store.rollups``) so dashboards never scan the order history.
+    """
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='sales_rollups')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='sales_rollups')
+    day = models.DateField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.PositiveIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vendor', 'product', 'day'], name='vendor_sales_rollup_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['vendor', 'day'], name='vendor_sales_rollup_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} on {self.day}: {self.units} units"
@@ -0,0 +1,172 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over (ordering field, id).
+
+    Each page is fetched with ``WHERE (field, id) > (last value, last id)``
+    instead of an OFFSET, and no COUNT query is issued, so deep pages cost the
+    same as the first one. Cursors are opaque base64 tokens.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering_param = 'ordering'
+    default_ordering = '-id'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 10)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(request, view)
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = bool(cursor and cursor['r'])
+
+        # Walking backwards flips both the comparison and the sort order.
+        descending = self.descending != reverse
+        if cursor:
+            queryset = queryset.filter(self.seek_filter(cursor['v'], cursor['id'], descending))
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(prefix + self.field, prefix + 'id')
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.results = results
+        self.has_next = has_more if not reverse else bool(cursor)
+        self.has_previous = bool(cursor) if not reverse else has_more
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_ordering(self, request, view):
+        """
+        Use ``?ordering=`` when it names one of the view's ``ordering_fields``,
+        otherwise the view's ``keyset_ordering`` or the class default.
+        """
+        allowed = getattr(view, 'ordering_fields', None) or []
+        requested = request.query_params.get(self.ordering_param, '').split(',')[0].strip()
+        if requested and requested.lstrip('-') in allowed:
+            ordering = requested
+        else:
+            ordering = getattr(view, 'keyset_ordering', self.default_ordering)
+        return ordering.lstrip('-'), ordering.startswith('-')
+
+    def seek_filter(self, value, pk, descending):
+        lookup = 'lt' if descending else 'gt'
+        if self.field == 'id':
+            return Q(**{'id__' + lookup: pk})
+        return (
+            Q(**{f'{self.field}__{lookup}': value})
+            | Q(**{self.field: value, 'id__' + lookup: pk})
+        )
+
+    def decode_cursor(self, request, model):
+        """
+        The decoded cursor, with its value converted by the ordering field;
+        anything stale or tampered with is a 404, never a server error.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if cursor['f'] != self.field or not isinstance(cursor['id'], int):
+                raise ValueError
+            cursor['v'] = model._meta.get_field(self.field).to_python(cursor['v'])
+            if cursor['v'] is None:
+                raise ValueError
+            cursor['r'] = bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError, DjangoValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, instance, reverse):
+        value = getattr(instance, self.field)
+        payload = {
+            'f': self.field,
+            'v': value if isinstance(value, (int, str)) or value is None else str(value),
+            'id': instance.pk,
+            'r': 1 if reverse else 0,
+        }
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, token.decode('ascii'))
+
+    def get_next_link(self):
+        if not self.has_next or not self.results:
+            return None
+        return self.encode_cursor(self.results[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.results:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.results[0], reverse=True)
+
+
+def wants_keyset_pagination(request):
+    """
+    Keyset pagination is opt-in: ``?paginate=cursor`` or an existing cursor.
+    """
+    params = request.query_params
+    return params.get('paginate') == 'cursor' or KeysetPagination.cursor_query_param in params
+
+
+class KeysetPaginationMixin:
+    """
+    Lets clients of a generic view switch from the default page-number
+    pagination to ``KeysetPagination``.
+    """
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if wants_keyset_pagination(self.request):
+                self._paginator = KeysetPagination()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
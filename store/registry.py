@@ -0,0 +1,114 @@
+"""
+Process-local, lazily loaded snapshot of the category table.
+
+Categories change rarely but are read on almost every request (validation,
+admin forms, listings), so they are loaded once per process and reused. A
+``Category`` save or delete drops this process's snapshot at once; other
+processes notice within ``CATEGORY_REGISTRY_CHECK_INTERVAL`` seconds, by
+comparing a cheap database stamp (row count and newest ``updated_at``) with
+the one their snapshot was loaded at. That works whatever cache backend is
+configured, and across hosts.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+
+
+def make_version(count, last_modified):
+    return f"{count}:{last_modified.isoformat() if last_modified else ''}"
+
+
+class CategorySnapshot:
+    def __init__(self, categories):
+        self.categories = categories
+        self.by_id = {category.pk: category for category in categories}
+        self.by_name = {}
+        for category in categories:
+            self.by_name.setdefault(category.name.lower(), category)
+        self.last_modified = max((category.updated_at for category in categories), default=None)
+        # Same stamp as CategoryRegistry.database_version(), from the rows themselves.
+        self.version = make_version(len(categories), self.last_modified)
+
+
+class CategoryRegistry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (snapshot, monotonic time until which it is trusted without a check)
+        self._state = (None, 0)
+
+    @property
+    def check_interval(self):
+        return getattr(settings, 'CATEGORY_REGISTRY_CHECK_INTERVAL', 5)
+
+    def database_version(self):
+        """
+        Stamp that changes with any insert, update or delete of a category.
+        """
+        from .models import Category
+
+        stamp = Category.objects.order_by().aggregate(count=Count('pk'), last_modified=Max('updated_at'))
+        return make_version(stamp['count'], stamp['last_modified'])
+
+    def load(self):
+        from .models import Category
+
+        return CategorySnapshot(list(Category.objects.order_by('name')))
+
+    def snapshot(self):
+        snapshot, trusted_until = self._state
+        if snapshot is not None and time.monotonic() < trusted_until:
+            return snapshot
+
+        in_transaction = transaction.get_connection().in_atomic_block
+        with self._lock:
+            snapshot, trusted_until = self._state
+            now = time.monotonic()
+            if snapshot is not None and now < trusted_until:
+                return snapshot  # Refreshed by another thread meanwhile.
+            if snapshot is not None and snapshot.version == self.database_version():
+                self._state = (snapshot, now + self.check_interval)
+                return snapshot
+            if in_transaction:
+                # Rows read inside a transaction may never be committed; don't
+                # keep them around for other requests.
+                return self.load()
+            snapshot = self.load()
+            self._state = (snapshot, now + self.check_interval)
+        return snapshot
+
+    @property
+    def version(self):
+        return self.snapshot().version
+
+    def categories(self):
+        """All categories ordered by name."""
+        return self.snapshot().categories
+
+    def get(self, pk):
+        try:
+            return self.snapshot().by_id.get(int(pk))
+        except (TypeError, ValueError):
+            return None
+
+    def get_by_name(self, name):
+        """Case-insensitive lookup; the first category by name order wins."""
+        return self.snapshot().by_name.get(name.lower())
+
+    def invalidate(self):
+        """
+        Drop this process's snapshot now and again once the surrounding
+        transaction commits (so nothing loaded in between survives).
+        """
+        self._state = (None, 0)
+
+        def drop():
+            self._state = (None, 0)
+
+        transaction.on_commit(drop)
+
+
+category_registry = CategoryRegistry()
@@ -0,0 +1,134 @@
+"""
+Time-bounded stock reservations for carts.
+
+Adding to a cart reserves the line's quantity until ``CART_RESERVATION_TTL``
+seconds from now. A product's available stock is its ``stock`` minus the
+unexpired reservations of other carts, read through the
+``(product, expires_at)`` index. Expired rows are ignored by every query and
+removed in batches by ``sweep_expired_reservations``.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Product, StockReservation
+
+SWEEP_BATCH_SIZE = 1000
+
+
+class StockUnavailable(Exception):
+
+    def __init__(self, product_id, requested, available):
+        self.product_id = product_id
+        self.requested = requested
+        self.available = available
+        super().__init__(f"Only {available} of product {product_id} available, {requested} requested")
+
+
+def reservation_ttl():
+    return datetime.timedelta(seconds=getattr(settings, 'CART_RESERVATION_TTL', 15 * 60))
+
+
+def live_reservations(now=None):
+    return StockReservation.objects.filter(expires_at__gt=now or timezone.now())
+
+
+def reserved_elsewhere(exclude_orders=None, now=None):
+    """
+    Subquery: units of ``OuterRef('pk')`` held by live reservations, leaving
+    out those of ``exclude_orders``.
+    """
+    reservations = live_reservations(now).filter(product=OuterRef('pk'))
+    if exclude_orders is not None:
+        reservations = reservations.exclude(order__in=exclude_orders)
+    total = reservations.order_by().values('product').annotate(total=Sum('quantity')).values('total')
+    return Coalesce(Subquery(total, output_field=IntegerField()), Value(0))
+
+
+def with_available_stock(queryset, exclude_orders=None):
+    """
+    Annotate ``available_stock`` (never below zero) onto a product queryset.
+    """
+    return queryset.annotate(
+        available_stock=Greatest(F('stock') - reserved_elsewhere(exclude_orders), Value(0))
+    )
+
+
+def reserve(order, product_id, quantity):
+    """
+    Hold ``quantity`` units of the product for ``order`` (replacing any
+    earlier hold and restarting its expiry). Raises ``StockUnavailable`` if
+    other carts have left too little.
+    """
+    if quantity <= 0:
+        release(order, product_id)
+        return None
+    with transaction.atomic():
+        # Lock the product row so two carts can't both take the last units.
+        product = (
+            with_available_stock(Product.objects.select_for_update().only('id', 'stock'), exclude_orders=[order])
+            .get(pk=product_id)
+        )
+        if quantity > product.available_stock:
+            raise StockUnavailable(product_id, quantity, product.available_stock)
+        reservation, _ = StockReservation.objects.update_or_create(
+            order=order,
+            product_id=product_id,
+            defaults={'quantity': quantity, 'expires_at': timezone.now() + reservation_ttl()},
+        )
+    return reservation
+
+
+def reserve_many(order, quantities):
+    """
+    ``reserve`` for several products at once: ``quantities`` maps product id
+    to the quantity to hold (0 releases). Checks availability with one query
+    and raises ``StockUnavailable`` for the first product that falls short.
+    """
+    held = {product_id: quantity for product_id, quantity in quantities.items() if quantity > 0}
+    with transaction.atomic():
+        available = dict(
+            with_available_stock(Product.objects.select_for_update().filter(pk__in=held), exclude_orders=[order])
+            .values_list('id', 'available_stock')
+        )
+        for product_id, quantity in sorted(held.items()):
+            if quantity > available.get(product_id, 0):
+                raise StockUnavailable(product_id, quantity, available.get(product_id, 0))
+        StockReservation.objects.filter(order=order, product_id__in=quantities).delete()
+        expires_at = timezone.now() + reservation_ttl()
+        StockReservation.objects.bulk_create([
+            StockReservation(order=order, product_id=product_id, quantity=quantity, expires_at=expires_at)
+            for product_id, quantity in held.items()
+        ])
+
+
+def release(order, product_id=None):
+    """
+    Drop the reservations of ``order`` (or only the one for ``product_id``).
+    """
+    reservations = StockReservation.objects.filter(order=order)
+    if product_id is not None:
+        reservations = reservations.filter(product_id=product_id)
+    reservations.delete()
+
+
+def sweep_expired_reservations(batch_size=SWEEP_BATCH_SIZE):
+    """
+    Delete expired reservations, ``batch_size`` rows per statement so the
+    sweep never holds a long lock. Returns the number deleted.
+    """
+    now = timezone.now()
+    deleted = 0
+    while True:
+        ids = list(
+            StockReservation.objects.filter(expires_at__lte=now)
+            .order_by()
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += StockReservation.objects.filter(pk__in=ids).delete()[0]
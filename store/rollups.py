@@ -0,0 +1,104 @@
+"""
+Maintenance of ``VendorSalesRollup`` rows.
+
+``record_sales`` adds freshly checked-out orders to the rollups with a fixed
+number of queries; ``rebuild_sales_rollups`` recomputes them from the order
+history for repairs and backfills.
+"""
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import OrderItem, VendorSalesRollup
+
+BATCH_SIZE = 1000
+
+LINE_TOTAL = ExpressionWrapper(F('quantity') * F('price'), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def record_sales(orders, day=None):
+    """
+    Add the items of ``orders`` (just checked out) to the rollup for ``day``.
+
+    Missing rows are inserted with zero totals first (ignoring rows a
+    concurrent checkout just created), then every row is incremented with
+    ``F()`` expressions, so concurrent checkouts never lose updates.
+    """
+    day = day or timezone.localdate()
+    totals = (
+        OrderItem.objects.filter(order__in=orders)
+        .values('product_id', 'product__vendor_id')
+        .annotate(revenue=Sum(LINE_TOTAL), units=Sum('quantity'), orders=Count('order', distinct=True))
+        .order_by()
+    )
+    totals = {row['product_id']: row for row in totals}
+    if not totals:
+        return 0
+
+    with transaction.atomic():
+        VendorSalesRollup.objects.bulk_create(
+            [
+                VendorSalesRollup(vendor_id=row['product__vendor_id'], product_id=product_id, day=day)
+                for product_id, row in totals.items()
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        rollups = list(
+            VendorSalesRollup.objects.filter(day=day, product_id__in=totals).only('id', 'product_id')
+        )
+        now = timezone.now()
+        for rollup in rollups:
+            row = totals[rollup.product_id]
+            rollup.revenue = F('revenue') + row['revenue']
+            rollup.units = F('units') + row['units']
+            rollup.orders = F('orders') + row['orders']
+            rollup.updated_at = now
+        VendorSalesRollup.objects.bulk_update(
+            rollups, ['revenue', 'units', 'orders', 'updated_at'], batch_size=BATCH_SIZE
+        )
+    return len(rollups)
+
+
+def rebuild_sales_rollups(vendor=None, since=None):
+    """
+    Recompute rollups from checked-out orders, optionally only for one vendor
+    and/or from ``since`` (a date) onwards. Returns the number of rows written.
+    """
+    items = OrderItem.objects.filter(order__checkout__isnull=False)
+    rollups = VendorSalesRollup.objects.all()
+    if vendor is not None:
+        items = items.filter(product__vendor=vendor)
+        rollups = rollups.filter(vendor=vendor)
+    if since is not None:
+        items = items.filter(order__checkout__created_at__date__gte=since)
+        rollups = rollups.filter(day__gte=since)
+
+    totals = (
+        items.annotate(day=TruncDate('order__checkout__created_at'))
+        .values('product__vendor_id', 'product_id', 'day')
+        .annotate(revenue=Sum(LINE_TOTAL), units=Sum('quantity'), orders=Count('order', distinct=True))
+        .order_by()
+    )
+    written = 0
+    with transaction.atomic():
+        rollups.delete()
+        batch = []
+        for row in totals.iterator(chunk_size=BATCH_SIZE):
+            batch.append(VendorSalesRollup(
+                vendor_id=row['product__vendor_id'],
+                product_id=row['product_id'],
+                day=row['day'],
+                revenue=row['revenue'],
+                units=row['units'],
+                orders=row['orders'],
+            ))
+            if len(batch) >= BATCH_SIZE:
+                VendorSalesRollup.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            VendorSalesRollup.objects.bulk_create(batch)
+            written += len(batch)
+    return written
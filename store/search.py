@@ -0,0 +1,114 @@
+"""
+Full-text search over product titles and descriptions.
+
+On SQLite the catalog is indexed by an FTS5 virtual table that mirrors
+``store_product`` (external content table) and is kept in sync by triggers,
+so every INSERT, UPDATE and DELETE on products - including bulk ones - keeps
+the index current. Other database backends fall back to DRF's ``LIKE`` search.
+"""
+from django.db import connections
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+
+from .models import Product
+
+
+PRODUCT_TABLE = Product._meta.db_table
+FTS_TABLE = f"{PRODUCT_TABLE}_fts"
+FTS_COLUMNS = ("title", "description")
+
+
+def fts_supported(connection):
+    return connection.vendor == "sqlite"
+
+
+def install_product_index(connection):
+    """
+    Create the FTS5 table and its sync triggers if they are missing.
+
+    Safe to call repeatedly. SQLite drops triggers when Django remakes the
+    product table during a migration, so this also runs after ``migrate``.
+    """
+    if not fts_supported(connection):
+        return
+    columns = ", ".join(FTS_COLUMNS)
+    new_values = ", ".join(f"new.{column}" for column in FTS_COLUMNS)
+    old_values = ", ".join(f"old.{column}" for column in FTS_COLUMNS)
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{columns}, content='{PRODUCT_TABLE}', content_rowid='id')",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {PRODUCT_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {PRODUCT_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {columns} ON {PRODUCT_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+    ]
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def uninstall_product_index(connection):
+    if not fts_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        for suffix in ("ai", "ad", "au"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def rebuild_product_index(using="default"):
+    """
+    Re-read every product row into the index. Used for backfills.
+    """
+    connection = connections[using]
+    if not fts_supported(connection):
+        return False
+    install_product_index(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def build_match_query(terms):
+    """
+    Turn user search terms into an FTS5 query: every term must match,
+    each one as a quoted prefix so punctuation can't break the syntax.
+    """
+    quoted = ['"%s"*' % term.replace('"', '""') for term in terms if term]
+    return " ".join(quoted)
+
+
+def search_products(queryset, terms):
+    """
+    Restrict ``queryset`` to products matching ``terms``, best BM25 match first.
+    """
+    match = build_match_query(terms)
+    if not match:
+        return queryset
+    matching_ids = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+    rank = RawSQL(
+        f"SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+        f"WHERE {FTS_TABLE} MATCH %s AND rowid = {PRODUCT_TABLE}.id",
+        (match,),
+        output_field=FloatField(),
+    )
+    return queryset.filter(pk__in=matching_ids).annotate(search_rank=rank).order_by("search_rank")
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    ``?search=`` backed by the FTS5 index, falling back to ``SearchFilter``
+    when the database has no full-text index.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        if not fts_supported(connections[queryset.db]):
+            return super().filter_queryset(request, queryset, view)
+        return search_products(queryset, terms)
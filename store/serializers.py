@@ -1,5 +1,7 @@
 from .models import * 
 from rest_framework import serializers
+from .registry import category_registry
+from .images import variant_urls
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -9,12 +11,35 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
+class RegistryCategoryField(serializers.PrimaryKeyRelatedField):
+    """
+    Category given by id (or, for older clients, by name), validated against
+    the category registry instead of a query per value.
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        category = category_registry.get(data)
+        if category is None and isinstance(data, str):
+            category = category_registry.get_by_name(data)
+        if category is None:
+            self.fail('does_not_exist', pk_value=data)
+        return category
+
+
 class ProductSerializer(serializers.ModelSerializer):
     vendor_name = serializers.CharField(source='vendor.username', read_only=True)
+    category_name = serializers.CharField(source='category.name', read_only=True, default=None)
+    image_variants = serializers.SerializerMethodField()
     class Meta: 
         model = Product
-        fields = ['id','title', 'category', 'description', 'stock','price',  'image', 'sold_count','vendor_name', 'created_at']
+        fields = ['id','title', 'category', 'category_name', 'description', 'stock','price',  'image', 'image_variants', 'sold_count','vendor_name', 'created_at']
         read_only_fields = ['vendor', 'sold_count', 'created_at']
+    def get_image_variants(self, obj):
+        """
+        Map of width to URL for the resized copies of the image.
+        """
+        return variant_urls(obj, self.context.get('request'))
     def get_image(self, obj):
         """
         Return the full URL for the image field.
@@ -26,25 +51,43 @@ class ProductSerializer(serializers.ModelSerializer):
 
 
 class ProductCreateSerializer(serializers.ModelSerializer):
+    category = RegistryCategoryField(queryset=Category.objects.all())
+
     class Meta:
         model = Product
         fields = ['id', 'title', 'category', 'description', 'stock', 'price', 'image', 'vendor', 'sold_count', 'created_at']
         read_only_fields = ['id', 'vendor', 'sold_count', 'created_at']
+
         
     def create(self, validated_data):
         return Product.objects.create(**validated_data)
 
 
+class ProductBulkUpdateSerializer(serializers.Serializer):
+    """
+    One entry of a bulk stock/price update.
+    """
+    id = serializers.IntegerField()
+    stock = serializers.IntegerField(min_value=0, required=False)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+
+    def validate(self, attrs):
+        if 'stock' not in attrs and 'price' not in attrs:
+            raise serializers.ValidationError("Provide stock and/or price.")
+        return attrs
+
+
 class ProductDetailSerializer(serializers.ModelSerializer):
     categories = CategorySerializer(many=True, read_only=True)
     vendor_name = serializers.CharField(source='vendor.username', read_only=True)
     is_in_stock = serializers.SerializerMethodField()
     total_sold = serializers.IntegerField(source='sold_count', read_only=True)
+    available_stock = serializers.IntegerField(read_only=True, default=None)
 
     class Meta:
         model = Product
         fields = [
-            'id', 'title', 'description', 'price', 'stock', 'is_in_stock', 
+            'id', 'title', 'description', 'price', 'stock', 'available_stock', 'is_in_stock', 
             'image', 'vendor_name', 'categories', 'total_sold', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'vendor_name', 'categories', 'total_sold', 'created_at', 'updated_at']
@@ -58,18 +101,21 @@ class OrderItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.title', read_only=True)
     product_price = serializers.DecimalField(source='product.price', read_only=True, max_digits=6, decimal_places=2)
     product_image = serializers.SerializerMethodField(source='product.image')
-    product_category = serializers.StringRelatedField(source='product.category')
+    product_image_variants = serializers.SerializerMethodField()
+    product_category = serializers.CharField(source='product.category.name', read_only=True, default=None)
     total_price = serializers.SerializerMethodField()
 
     class Meta:
         model = OrderItem
-        fields = ['id', 'product', 'product_name','product_image', 'vendor_name','product_category', 'quantity', 'price', 'product_price', 'total_price']
+        fields = ['id', 'product', 'product_name','product_image', 'product_image_variants', 'vendor_name','product_category', 'quantity', 'price', 'product_price', 'total_price']
 
     def get_total_price(self, obj):
         return obj.quantity * obj.price
     def get_product_image(self, obj):
         # Fetch the product image URL
         return obj.product.image.url if obj.product and obj.product.image else None
+    def get_product_image_variants(self, obj):
+        return variant_urls(obj.product) if obj.product else {}
 
 
 
@@ -88,6 +134,38 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'order_items', 'total_price', 'orderstat','status','created_at', 'updated_at']
         read_only_fields = ['id','status', 'total_price', 'created_at', 'updated_at']
 
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """
+    Order list entry without items; counts come from queryset annotations.
+    """
+    item_count = serializers.IntegerField(read_only=True)
+    units = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['id', 'total_price', 'orderstat', 'status', 'item_count', 'units', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
+class CartOperationSerializer(serializers.Serializer):
+    """
+    One step of a batch cart update: ``add`` quantity to a line, ``set`` it
+    (0 removes it) or ``remove`` it.
+    """
+    op = serializers.ChoiceField(choices=['add', 'set', 'remove'])
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, required=False)
+
+    def validate(self, attrs):
+        if attrs['op'] == 'add':
+            attrs.setdefault('quantity', 1)
+            if attrs['quantity'] < 1:
+                raise serializers.ValidationError("Quantity to add must be positive.")
+        elif attrs['op'] == 'set' and 'quantity' not in attrs:
+            raise serializers.ValidationError("Quantity is required to set a line.")
+        return attrs
+
+
 class CheckoutSerializer(serializers.ModelSerializer):
     """
     Serializer for the Checkout model.
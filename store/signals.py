@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog_cache import catalog_cache
+from .models import Category, Product
+from .registry import category_registry
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_registry(sender, **kwargs):
+    category_registry.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_catalog_cache(sender, **kwargs):
+    catalog_cache.bump_generation()
@@ -0,0 +1,55 @@
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASHED_NAME = re.compile(r'^[0-9a-f]{64}$')
+
+
+def is_content_addressed(name):
+    """
+    True for names produced by ``ContentAddressedStorage``; their contents
+    can never change, so they are safe to cache forever.
+    """
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return bool(HASHED_NAME.match(stem))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names files by the SHA-256 of their contents.
+
+    ``products/photo.jpg`` is stored as ``products/ab/cd/abcd….jpg``: the two
+    levels of hashed subdirectories keep directories small, and an upload
+    identical to an existing file reuses it instead of writing a copy. Since a
+    file may be shared by several rows, stored files must not be deleted
+    when a single row stops referencing them.
+    """
+    chunk_size = 64 * 1024
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, self.content_hash(content))
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def content_hash(self, content):
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks(self.chunk_size):
+            digest.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        return digest.hexdigest()
+
+    def hashed_name(self, name, digest):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest[:2], digest[2:4], digest + extension).replace('\\', '/')
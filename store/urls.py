@@ -4,15 +4,23 @@ from.views import( AddToCartView,
                   RemoveFromCartView,
                     UpdateCartView,
                   ProductListView,
+                  ProductFacetsView,
                   ProductDetailView,
                   ProductCreateView,
+                  ProductImportView,
                   ProductUpdateView,
+                  ProductBulkUpdateView,
+                  VendorDashboardExportView,
+                  VendorSalesStatsView,
+                  CartBatchView,
                   ProductDeleteView,
                   VendorDashboardView,
                   WishlistView,
                   AddToWishlistView,
                   RemoveFromWishlistView,
                   CategoryListView,
+                  CategoryTreeView,
+                  CatalogCacheStatsView,
                   CheckoutView,
                   CheckoutRetrieveAPIView,
                   OrderView
@@ -23,17 +31,25 @@ from.views import( AddToCartView,
 urlpatterns = [
 
     path('api/categories/', CategoryListView.as_view(), name='category-list'),
+    path('api/categories/tree/', CategoryTreeView.as_view(), name='category-tree'),
+    path('api/catalog/cache-stats/', CatalogCacheStatsView.as_view(), name='catalog-cache-stats'),
     path('api/products/', ProductListView.as_view(), name='product-list'),
+    path('api/products/facets/', ProductFacetsView.as_view(), name='product-facets'),
     path('api/products/<int:id>/', ProductDetailView.as_view(), name='product-detail'),
 
     path('api/store/product/create/', ProductCreateView.as_view(), name='product-create'),
+    path('api/store/product/import/', ProductImportView.as_view(), name='product-import'),
     path('api/store/product/update/<int:pk>/', ProductUpdateView.as_view(), name='product-update'),
+    path('api/store/product/bulk-update/', ProductBulkUpdateView.as_view(), name='product-bulk-update'),
     path('api/store/product/delete/<int:pk>/', ProductDeleteView.as_view(), name='product-delete'),
     path('api/vendor/dashboard/', VendorDashboardView.as_view(), name='vendor-dashboard'),
+    path('api/vendor/dashboard/stats/', VendorSalesStatsView.as_view(), name='vendor-dashboard-stats'),
+    path('api/vendor/dashboard/export/<str:export_format>/', VendorDashboardExportView.as_view(), name='vendor-dashboard-export'),
 
     path('api/orders/', OrderView.as_view(), name='order-list'),
   
     path('api/cart/add/', AddToCartView.as_view(), name='add-to-cart'),
+    path('api/cart/batch/', CartBatchView.as_view(), name='cart-batch'),
     path('api/cart/remove/<int:pk>/', RemoveFromCartView.as_view(), name='remove-from-cart'),
     path('api/cart/update/<int:pk>/', UpdateCartView.as_view(), name='update-cart'),
     path('api/cart/view/', ViewCartView.as_view(), name='view-cart'),
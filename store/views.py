@@ -13,14 +13,34 @@ from.models import *
 from.serializers import *
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from client.permissions import IsVendorPermission
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.exceptions import ValidationError,PermissionDenied
 from decimal import Decimal
 import requests
 from django.core.files.base import ContentFile
+from .search import ProductSearchFilter
+from .filters import CheckoutFilter, ProductFilter
+from .registry import category_registry
+from .images import schedule_image_variants
+from .catalog_cache import catalog_cache
+from .importer import detect_format, import_products
+from .exports import CONTENT_TYPES as EXPORT_CONTENT_TYPES, stream_products
+from .rollups import record_sales
+from .inventory import InsufficientStock, take_stock
+from .idempotency import IdempotentMixin
+from .reservations import StockUnavailable, release, reserve, reserve_many, with_available_stock
+from rest_framework.parsers import MultiPartParser
+from .conditional import make_etag, not_modified, queryset_validators, rows_validators, set_validators
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Prefetch, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+import datetime
+from django.db.models.functions import Coalesce, Floor
+from .pagination import KeysetPagination, KeysetPaginationMixin, wants_keyset_pagination
 
 
 class CategoryListView(APIView):
@@ -28,38 +48,202 @@ class CategoryListView(APIView):
     API view to retrieve all categories as choices.
     """
     def get(self, request):
-        categories = Category.objects.all()
-        serialized_categories = CategorySerializer(categories, many=True).data
-        # Format categories as choices
-        choices = [{'value': category['id'], 'label': category['name']} for category in serialized_categories]
-        return Response(choices)
+        cache_key = catalog_cache.make_key('category-list', request)
+        entry = catalog_cache.get(cache_key)
+        if entry is None:
+            snapshot = category_registry.snapshot()
+            # Format categories as choices
+            entry = {
+                'data': [{'value': category.id, 'label': category.name} for category in snapshot.categories],
+                'etag': make_etag('categories', snapshot.version, len(snapshot.categories), snapshot.last_modified),
+                'last_modified': snapshot.last_modified,
+            }
+            catalog_cache.set(cache_key, entry)
+        cached = not_modified(request, entry['etag'], entry['last_modified'])
+        if cached:
+            return cached
+        return set_validators(Response(entry['data']), entry['etag'], entry['last_modified'])
+
+
+class CatalogCacheStatsView(APIView):
+    """
+    API view exposing catalog response cache hit/miss counters to staff.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(catalog_cache.stats())
+
+
+class CategoryTreeView(APIView):
+    """
+    API view to retrieve the whole category hierarchy as a nested tree.
+    Pass ``?root=<id>`` to get only that category's subtree.
+    """
+    def get(self, request):
+        categories = category_registry.categories()
+        root_id = request.query_params.get('root')
+        if root_id:
+            root = category_registry.get(root_id)
+            if root is None:
+                return Response({"error": "Category not found."}, status=status.HTTP_404_NOT_FOUND)
+            categories = [category for category in categories if category.path.startswith(root.path)]
+
+        # Ordering by depth puts every parent before its children.
+        nodes = {}
+        tree = []
+        for category in sorted(categories, key=lambda category: category.depth):
+            node = {'id': category.id, 'name': category.name, 'children': []}
+            nodes[category.id] = node
+            parent = nodes.get(category.parent_id)
+            (parent['children'] if parent else tree).append(node)
+        return Response(tree)
     
-class ProductListView(ListAPIView):
+class ProductListView(KeysetPaginationMixin, ListAPIView):
     """
     API view to retrieve a list of all products with filters, search, and pagination.
+    Pass ``?paginate=cursor`` for keyset pagination instead of page numbers.
     """
-    queryset = Product.objects.all()
+    queryset = Product.objects.select_related('vendor', 'category')
     serializer_class = ProductSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['id','category']
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, OrderingFilter]
+    filterset_class = ProductFilter
     search_fields = ['title', 'description']
     ordering_fields = ['price', 'sold_count', 'title']
 
+    def list(self, request, *args, **kwargs):
+        """
+        Answer repeat requests with 304 when no product matching the filters
+        has changed, before serializing anything. Anonymous responses are
+        served from the catalog cache. Keyset pages take their validators
+        from the fetched rows rather than aggregating the whole filtered set.
+        """
+        cache_key = None
+        if not request.user.is_authenticated:
+            cache_key = catalog_cache.make_key('product-list', request)
+            entry = catalog_cache.get(cache_key)
+            if entry is not None:
+                cached = not_modified(request, entry['etag'], entry['last_modified'])
+                if cached:
+                    return cached
+                return set_validators(Response(entry['data']), entry['etag'], entry['last_modified'])
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if isinstance(self.paginator, KeysetPagination):
+            page = self.paginate_queryset(queryset)
+            etag, last_modified = rows_validators(
+                page, self.paginator.has_next, self.paginator.has_previous,
+                request.build_absolute_uri(), category_registry.version,
+            )
+        else:
+            page = None
+            etag, last_modified = queryset_validators(
+                queryset, request.build_absolute_uri(), category_registry.version
+            )
+        cached = not_modified(request, etag, last_modified)
+        if cached:
+            return cached
+
+        if page is None:
+            page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+        else:
+            serializer = self.get_serializer(queryset, many=True)
+            response = Response(serializer.data)
+        if cache_key:
+            catalog_cache.set(cache_key, {'data': response.data, 'etag': etag, 'last_modified': last_modified})
+        return set_validators(response, etag, last_modified)
+
+class ProductFacetsView(generics.GenericAPIView):
+    """
+    API view returning sidebar aggregates for the products matching the same
+    filters and search as ProductListView: per-category counts, a price
+    histogram (``?price_interval=``, default 50) and stock counts.
+    One grouped query per facet; results are served from the catalog cache.
+    """
+    queryset = Product.objects.all()
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter]
+    filterset_class = ProductFilter
+    search_fields = ProductListView.search_fields
+    default_price_interval = Decimal('50')
+
+    def get(self, request):
+        try:
+            interval = Decimal(request.query_params.get('price_interval', self.default_price_interval))
+            if not interval.is_finite() or interval <= 0:
+                raise ValueError
+        except (ArithmeticError, ValueError):
+            return Response({"error": "price_interval must be a positive number."}, status=status.HTTP_400_BAD_REQUEST)
+
+        cache_key = catalog_cache.make_key('product-facets', request)
+        facets = catalog_cache.get(cache_key)
+        if facets is None:
+            facets = self.compute_facets(self.filter_queryset(self.get_queryset()).order_by(), interval)
+            catalog_cache.set(cache_key, facets)
+        return Response(facets)
+
+    def compute_facets(self, queryset, interval):
+        totals = queryset.aggregate(
+            total=Count('id'),
+            in_stock=Count('id', filter=Q(stock__gt=0)),
+            min_price=Min('price'),
+            max_price=Max('price'),
+        )
+        categories = (
+            queryset.values('category_id', 'category__name')
+            .annotate(count=Count('id'))
+            .order_by('-count', 'category__name')
+        )
+        buckets = (
+            queryset.annotate(bucket=Floor(F('price') / interval))
+            .values('bucket')
+            .annotate(count=Count('id'))
+            .order_by('bucket')
+        )
+        return {
+            'total': totals['total'],
+            'in_stock': totals['in_stock'],
+            'out_of_stock': totals['total'] - totals['in_stock'],
+            'categories': [
+                {'id': row['category_id'], 'name': row['category__name'], 'count': row['count']}
+                for row in categories
+            ],
+            'price': {
+                'min': totals['min_price'],
+                'max': totals['max_price'],
+                'interval': interval,
+                'buckets': [
+                    {
+                        'from': int(row['bucket']) * interval,
+                        'to': (int(row['bucket']) + 1) * interval,
+                        'count': row['count'],
+                    }
+                    for row in buckets
+                ],
+            },
+        }
+
 class VendorDashboardView(APIView):
     """
     Dashboard for vendors to manage their products.
     """
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated, IsVendorPermission]
+    ordering_fields = ['created_at', 'price', 'stock', 'sold_count']
+    keyset_ordering = '-created_at'
 
     def get(self, request):
         """
-        List all products owned by the vendor.
+        List the products owned by the vendor, one cursor page at a time.
         """
         vendor = request.user.vendor
-        products = Product.objects.filter(vendor=vendor)
-        serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+        products = Product.objects.filter(vendor=vendor).select_related('vendor', 'category')
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(products, request, view=self)
+        serializer = ProductSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         """
@@ -68,10 +252,121 @@ class VendorDashboardView(APIView):
         vendor = request.user.vendor
         serializer = ProductCreateSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(vendor=vendor)
+            product = serializer.save(vendor=vendor)
+            schedule_image_variants(product)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)    
 
+class VendorDashboardExportView(APIView):
+    """
+    Download every product the vendor owns as CSV or NDJSON, streamed.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, IsVendorPermission]
+
+    def get(self, request, export_format):
+        try:
+            vendor = request.user.vendor
+        except Vendor.DoesNotExist:
+            raise PermissionDenied("You must be a vendor to export products.")
+        if export_format not in EXPORT_CONTENT_TYPES:
+            return Response(
+                {"error": f"Unsupported format. Use one of: {', '.join(EXPORT_CONTENT_TYPES)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        products = Product.objects.filter(vendor=vendor)
+        return stream_products(products, export_format, request, filename=f'products-{vendor.pk}')
+
+def parse_day(value):
+    """
+    ``YYYY-MM-DD`` query parameter to a date (None if absent); ValueError if malformed.
+    """
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(value)
+    return day
+
+class VendorSalesStatsView(APIView):
+    """
+    Revenue, units and orders for the vendor over a date range
+    (``?start=`` / ``?end=``, ``YYYY-MM-DD``; the last 30 days by default),
+    per day and per product. Reads only the pre-aggregated rollup rows, so
+    ``orders`` in the totals counts an order once per product it contains.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, IsVendorPermission]
+    default_days = 30
+    max_days = 366
+
+    def get(self, request):
+        try:
+            vendor = request.user.vendor
+        except Vendor.DoesNotExist:
+            raise PermissionDenied("You must be a vendor to view sales.")
+
+        try:
+            end = parse_day(request.query_params.get('end')) or timezone.localdate()
+            start = parse_day(request.query_params.get('start')) or end - datetime.timedelta(days=self.default_days - 1)
+        except ValueError:
+            return Response({"error": "Dates must be in YYYY-MM-DD format."}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({"error": "start must not be after end."}, status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= self.max_days:
+            return Response({"error": f"The range may span at most {self.max_days} days."}, status=status.HTTP_400_BAD_REQUEST)
+
+        rollups = VendorSalesRollup.objects.filter(vendor=vendor, day__range=(start, end)).order_by()
+        sums = {'revenue': Sum('revenue'), 'units': Sum('units'), 'orders': Sum('orders')}
+        totals = rollups.aggregate(**sums)
+        days = rollups.values('day').annotate(**sums).order_by('day')
+        products = (
+            rollups.values('product_id', 'product__title')
+            .annotate(**sums)
+            .order_by('-revenue', 'product_id')
+        )
+        return Response({
+            "start": start,
+            "end": end,
+            "totals": {key: value or 0 for key, value in totals.items()},
+            "days": list(days),
+            "products": [
+                {
+                    "product_id": row['product_id'],
+                    "title": row['product__title'],
+                    "revenue": row['revenue'],
+                    "units": row['units'],
+                    "orders": row['orders'],
+                } for row in products
+            ],
+        }, status=status.HTTP_200_OK)
+
+class ProductImportView(APIView):
+    """
+    Bulk-create products for the vendor from an uploaded CSV or JSON Lines
+    file (``file`` field; format from the extension or ``file_format``).
+    Returns counts and a per-row error report.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, IsVendorPermission]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        try:
+            vendor = request.user.vendor
+        except Vendor.DoesNotExist:
+            raise PermissionDenied("You must be a vendor to import products.")
+
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({"error": "A CSV or JSONL file is required."}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = detect_format(upload.name, request.data.get('file_format'))
+        if not file_format:
+            return Response({"error": "Unsupported file format; use CSV or JSONL."}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = import_products(upload.file, file_format, vendor)
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
+
 class ProductUpdateView(generics.UpdateAPIView):
     """
     API view to allow only vendors to update their products.
@@ -125,18 +420,94 @@ class ProductUpdateView(generics.UpdateAPIView):
         """
         instance = serializer.instance
         validated_data = serializer.validated_data
+        # Only write the columns that were sent
+        update_fields = set(validated_data) | {"updated_at"}
 
         # Update image only if provided
         if "image" in validated_data:
             instance.image = validated_data["image"]
+            instance.image_variants = {}
+            update_fields.add("image_variants")
 
         # Update other fields dynamically
         for attr, value in validated_data.items():
             if attr != "image":  # Skip image, as it's already handled
                 setattr(instance, attr, value)
 
-        instance.save()
+        instance.save(update_fields=sorted(update_fields))
+        if "image" in validated_data:
+            schedule_image_variants(instance)
     
+class ProductBulkUpdateView(APIView):
+    """
+    Apply a batch of stock and/or price changes to the vendor's products:
+    ``[{"id": 1, "stock": 5}, {"id": 2, "price": "9.99"}, ...]``.
+    Ownership is checked with one query and all changes are written in one
+    transaction, touching only the columns that changed.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated, IsVendorPermission]
+    max_batch_size = 5000
+
+    def patch(self, request):
+        try:
+            vendor = request.user.vendor
+        except Vendor.DoesNotExist:
+            raise PermissionDenied("You must be a vendor to update products.")
+
+        if not isinstance(request.data, list) or not request.data:
+            return Response({"error": "Expected a non-empty list of changes."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > self.max_batch_size:
+            return Response(
+                {"error": f"At most {self.max_batch_size} changes per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = ProductBulkUpdateSerializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        changes = {item['id']: item for item in serializer.validated_data}
+        if len(changes) != len(serializer.validated_data):
+            return Response({"error": "Each product may appear only once."}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            products = list(
+                Product.objects.select_for_update()
+                .filter(vendor=vendor, pk__in=changes)
+                .only('id', 'stock', 'price')
+            )
+            missing = sorted(set(changes) - {product.pk for product in products})
+            if missing:
+                return Response(
+                    {"error": "Products not found or not owned by you.", "ids": missing},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+
+            # Group rows by which columns actually changed so each UPDATE
+            # writes only those columns.
+            now = timezone.now()
+            groups = {}
+            for product in products:
+                item = changes[product.pk]
+                fields = tuple(
+                    field for field in ('price', 'stock')
+                    if field in item and getattr(product, field) != item[field]
+                )
+                if not fields:
+                    continue
+                for field in fields:
+                    setattr(product, field, item[field])
+                product.updated_at = now
+                groups.setdefault(fields, []).append(product)
+
+            for fields, group in groups.items():
+                Product.objects.bulk_update(group, [*fields, 'updated_at'], batch_size=500)
+
+        updated = sum(len(group) for group in groups.values())
+        if updated:
+            catalog_cache.bump_generation()
+        return Response({"updated": updated, "unchanged": len(products) - updated}, status=status.HTTP_200_OK)
+
 class ProductDeleteView(generics.DestroyAPIView):
     """
     API view to allow only vendors to delete their products.
@@ -166,7 +537,7 @@ class ProductDetailView(RetrieveAPIView):
         """
         product_id = self.kwargs.get("id")  # Get the 'id' from the URL
         try:
-            return Product.objects.get(id=product_id)
+            return with_available_stock(Product.objects.select_related('vendor')).get(id=product_id)
         except Product.DoesNotExist:
             return None
 
@@ -177,8 +548,14 @@ class ProductDetailView(RetrieveAPIView):
         product = self.get_object()
         if not product:
             return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        # Availability changes as reservations come and go without touching
+        # updated_at, so only the ETag (which includes it) is a safe validator.
+        etag = make_etag('product', product.pk, product.updated_at, product.available_stock)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
         serializer = self.get_serializer(product)
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), etag)
 
 class ProductCreateView(CreateAPIView):
     """
@@ -199,9 +576,34 @@ class ProductCreateView(CreateAPIView):
             raise PermissionDenied("You must be a vendor to create products.")
 
         # Save the product with the associated vendor
-        serializer.save(vendor=vendor)
+        product = serializer.save(vendor=vendor)
+        schedule_image_variants(product)
 
-class AddToCartView(APIView):
+def order_items_prefetch():
+    """
+    Load an order's items with their products in one query, for OrderSerializer.
+    """
+    return Prefetch(
+        'order_items',
+        queryset=OrderItem.objects.select_related('product__vendor', 'product__category').order_by('id'),
+    )
+
+def serialize_cart(cart):
+    cart = Order.objects.select_related('user').prefetch_related(order_items_prefetch()).get(pk=cart.pk)
+    return OrderSerializer(cart).data
+
+def stock_unavailable_response(exc):
+    return Response(
+        {
+            "error": "Not enough stock available.",
+            "product_id": exc.product_id,
+            "requested": exc.requested,
+            "available": exc.available,
+        },
+        status=status.HTTP_409_CONFLICT,
+    )
+
+class AddToCartView(IdempotentMixin, APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
@@ -212,28 +614,108 @@ class AddToCartView(APIView):
 
         if not product_id:
             return Response({"error": "Product ID is required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            return Response({"error": "Quantity must be a whole number."}, status=status.HTTP_400_BAD_REQUEST)
+        if quantity <= 0:
+            return Response({"error": "Quantity must be positive."}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
             product = Product.objects.get(pk=product_id)
         except Product.DoesNotExist:
             return Response({"error": "Product not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        # Retrieve or create cart
-        cart, created = Order.objects.get_or_create(user=user, status='CART')
+        try:
+            with transaction.atomic():
+                cart = Order.get_or_create_cart(user)
+                line_quantity = OrderItem.add_quantity(cart, product, quantity)
 
-        # Retrieve or create order item
-        order_item, created = OrderItem.objects.get_or_create(
-            order=cart, product=product,
-            defaults={'quantity': quantity, 'price': product.price}
-        )
+                # Hold the whole line; rolls the cart change back if it can't be held.
+                reserve(cart, product.pk, line_quantity)
+                Order.update_total_price(cart.pk)
+        except StockUnavailable as exc:
+            return stock_unavailable_response(exc)
 
-        if not created:
-            order_item.quantity += int(quantity)
-            order_item.save()
+        return Response(serialize_cart(cart), status=status.HTTP_200_OK)
 
-        cart.calculate_total_price()
+class CartBatchView(IdempotentMixin, APIView):
+    """
+    Apply a list of cart operations in one request:
+    ``{"operations": [{"op": "add", "product_id": 1, "quantity": 2},
+    {"op": "set", "product_id": 2, "quantity": 1}, {"op": "remove", "product_id": 3}]}``.
+    Operations run in order, all in one transaction, and the final cart is returned.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    max_operations = 500
 
-        return Response(OrderSerializer(cart).data, status=status.HTTP_200_OK)
+    def post(self, request):
+        user = request.user.customer
+        operations = request.data.get('operations') if isinstance(request.data, dict) else request.data
+        if not isinstance(operations, list) or not operations:
+            return Response({"error": "Expected a non-empty list of operations."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > self.max_operations:
+            return Response(
+                {"error": f"At most {self.max_operations} operations per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = CartOperationSerializer(data=operations, many=True)
+        if not serializer.is_valid():
+            return Response({"error": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        operations = serializer.validated_data
+
+        products = Product.objects.only('id', 'price').in_bulk({op['product_id'] for op in operations})
+        missing = sorted({op['product_id'] for op in operations} - set(products))
+        if missing:
+            return Response({"error": "Products not found.", "ids": missing}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            with transaction.atomic():
+                cart = Order.get_or_create_cart(user)
+                # Serialize batches on the same cart.
+                Order.objects.select_for_update().only('id').get(pk=cart.pk)
+                items = {item.product_id: item for item in cart.order_items.all()}
+
+                # Work out the final quantity of every touched line first.
+                quantities = {}
+                for op in operations:
+                    product_id = op['product_id']
+                    current = quantities.get(product_id, items[product_id].quantity if product_id in items else 0)
+                    if op['op'] == 'add':
+                        quantities[product_id] = current + op['quantity']
+                    elif op['op'] == 'set':
+                        quantities[product_id] = op['quantity']
+                    else:
+                        quantities[product_id] = 0
+
+                to_create, to_update, to_delete = [], [], []
+                for product_id, quantity in quantities.items():
+                    item = items.get(product_id)
+                    if item is None:
+                        if quantity > 0:
+                            to_create.append(OrderItem(
+                                order=cart, product_id=product_id, quantity=quantity, price=products[product_id].price,
+                            ))
+                    elif quantity <= 0:
+                        to_delete.append(item.pk)
+                    elif quantity != item.quantity:
+                        item.quantity = quantity
+                        to_update.append(item)
+
+                reserve_many(cart, quantities)
+                # Bulk writes skip OrderItem.save(), so the total is refreshed once below.
+                if to_delete:
+                    OrderItem.objects.filter(pk__in=to_delete).delete()
+                if to_update:
+                    OrderItem.objects.bulk_update(to_update, ['quantity'])
+                if to_create:
+                    OrderItem.objects.bulk_create(to_create)
+                Order.update_total_price(cart.pk)
+        except StockUnavailable as exc:
+            return stock_unavailable_response(exc)
+
+        return Response(serialize_cart(cart), status=status.HTTP_200_OK)
 
 class RemoveFromCartView(APIView):
     authentication_classes = [JWTAuthentication]
@@ -247,8 +729,9 @@ class RemoveFromCartView(APIView):
         except (Order.DoesNotExist, OrderItem.DoesNotExist):
             return Response({"error": "Item not found in cart."}, status=status.HTTP_404_NOT_FOUND)
 
-        order_item.delete()
-        cart.calculate_total_price()
+        with transaction.atomic():
+            order_item.delete()
+            release(cart, order_item.product_id)
 
         return Response({"message": "Item removed from cart."}, status=status.HTTP_200_OK)
 
@@ -266,7 +749,7 @@ class UpdateCartView(UpdateAPIView):
         Raise an error if no cart or item is found.
         """
         user = self.request.user
-        cart = Order.get_cart(user)
+        cart = Order.get_cart(user).first()
         if not cart:
             raise serializers.ValidationError("No active cart found.")
         return OrderItem.objects.filter(order=cart)
@@ -279,14 +762,17 @@ class UpdateCartView(UpdateAPIView):
         quantity = int(request.data.get('quantity', 1))
 
         if quantity <= 0:
-            instance.delete()
+            with transaction.atomic():
+                instance.delete()
+                release(instance.order, instance.product_id)
         else:
-            instance.quantity = quantity
-            instance.save()
-
-        # Recalculate cart total price
-        cart = instance.order
-        cart.calculate_total_price()
+            try:
+                with transaction.atomic():
+                    instance.quantity = quantity
+                    instance.save()
+                    reserve(instance.order, instance.product_id, quantity)
+            except StockUnavailable as exc:
+                return stock_unavailable_response(exc)
 
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
@@ -301,31 +787,61 @@ class ViewCartView(APIView):
         if not cart:
             return Response({"error": "Cart is empty."}, status=status.HTTP_404_NOT_FOUND)
 
-        return Response(OrderSerializer(cart).data, status=status.HTTP_200_OK)
+        # Item changes always touch the cart; product edits show up through
+        # the newest product timestamp.
+        stats = Order.objects.filter(pk=cart.pk).aggregate(
+            items=Count('order_items'),
+            products_modified=Max('order_items__product__updated_at'),
+        )
+        last_modified = max(filter(None, [cart.updated_at, stats['products_modified']]))
+        etag = make_etag('cart', cart.pk, cart.updated_at, stats['items'], stats['products_modified'])
+        cached = not_modified(request, etag, last_modified)
+        if cached:
+            return cached
+
+        return set_validators(Response(serialize_cart(cart), status=status.HTTP_200_OK), etag, last_modified)
     
 
 
 class OrderView(APIView):
     """
-    API view to retrieve all orders, a specific order, or the active order for the authenticated user.
+    API view to retrieve the order history or a specific order for the authenticated user.
     """
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
+    keyset_ordering = '-created_at'
 
     def get(self, request, order_id=None):
+        """
+        Cursor-paginated order history, newest first. ``?view=summary`` lists
+        only totals, status and item counts, without the nested items.
+        """
         try:
             user = request.user.customer  # Assuming a Customer model related to the User
-            
+            orders = Order.objects.filter(user=user)
+
             if order_id:
                 # Retrieve specific order
-                order = Order.objects.filter(id=order_id, user=user)
+                order = orders.select_related('user').prefetch_related(order_items_prefetch()).get(id=order_id)
                 serializer = OrderSerializer(order)
                 return Response(serializer.data, status=status.HTTP_200_OK)
+
+            paginator = KeysetPagination()
+            if request.query_params.get('view') == 'summary':
+                # Counts come from the same query as the page itself.
+                orders = orders.only(
+                    'id', 'total_price', 'orderstat', 'status', 'created_at', 'updated_at',
+                ).annotate(
+                    item_count=Count('order_items'),
+                    units=Coalesce(Sum('order_items__quantity'), 0),
+                )
+                page = paginator.paginate_queryset(orders, request, view=self)
+                serializer = OrderSummarySerializer(page, many=True)
             else:
-                # Retrieve all orders for the user
-                orders = Order.objects.filter(user=user).order_by('-created_at')
-                serializer = OrderSerializer(orders, many=True)
-                return Response(serializer.data, status=status.HTTP_200_OK)
+                orders = orders.select_related('user').prefetch_related(order_items_prefetch())
+                page = paginator.paginate_queryset(orders, request, view=self)
+                serializer = OrderSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
         except Order.DoesNotExist:
             return Response({"error": "Order not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -337,7 +853,12 @@ class WishlistView(APIView):
 
     def get(self, request):
         customer = Customer.objects.get(id=request.user.id)
-        wishlist_items = Favorite.objects.filter(customer=customer)
+        wishlist_items = Favorite.objects.filter(customer=customer).select_related('product__vendor', 'product__category')
+        if wants_keyset_pagination(request):
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(wishlist_items, request, view=self)
+            serializer = ProductSerializer([favorite.product for favorite in page], many=True)
+            return paginator.get_paginated_response(serializer.data)
         products = [favorite.product for favorite in wishlist_items]
         serializer = ProductSerializer(products, many=True)
         return Response(serializer.data, status=200)
@@ -378,7 +899,7 @@ class RemoveFromWishlistView(DestroyAPIView):
         except Favorite.DoesNotExist:
             return Response({"error": "Product not in your wishlist."}, status=404)
         
-class CheckoutView(APIView):
+class CheckoutView(IdempotentMixin, APIView):
     """
     View to handle the checkout process.
     Automatically fetches user_id and processes all CART orders for the authenticated user.
@@ -394,11 +915,6 @@ class CheckoutView(APIView):
             if not hasattr(user, 'customer'):
                 return Response({"error": "User is not a customer."}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Fetch all CART orders for the user
-            cart_orders = Order.objects.filter(user=user.customer, status='CART')
-            if not cart_orders.exists():
-                return Response({"error": "Cart not found or is empty."}, status=status.HTTP_400_BAD_REQUEST)
-
             # Process payment and create checkouts for each order
             payment_method = serializer.validated_data['payment_method']
             shipping_address = serializer.validated_data['shipping_address']
@@ -407,33 +923,54 @@ class CheckoutView(APIView):
             if not payment_status:
                 return Response({"error": "Invalid payment method."}, status=status.HTTP_400_BAD_REQUEST)
 
-            checkouts = []
-            for cart in cart_orders:
-                # Calculate total price
-                cart.calculate_total_price()
-
-                # Create Checkout entry
-                checkout = Checkout.objects.create(
-                    user=user.customer,
-                    order=cart,
-                    payment_method=payment_method,
-                    shipping_address=shipping_address,
-                    payment_status='PENDING' if payment_status else 'FAILED'
+            # Everything below runs in one transaction with a fixed number of
+            # queries, however many carts or lines there are.
+            try:
+                with transaction.atomic():
+                    # Lock the CART orders so a concurrent checkout can't take them too.
+                    cart_ids = list(
+                        Order.objects.select_for_update()
+                        .filter(user=user.customer, status='CART')
+                        .values_list('id', flat=True)
+                    )
+                    if not cart_ids:
+                        return Response({"error": "Cart not found or is empty."}, status=status.HTTP_400_BAD_REQUEST)
+
+                    take_stock(cart_ids)
+                    # Final totals and the status change in a single UPDATE.
+                    Order.objects.filter(pk__in=cart_ids).update(
+                        total_price=Order.total_price_expression(),
+                        status='PENDING',
+                        orderstat='PROCESSING',
+                        updated_at=timezone.now(),
+                    )
+                    checkouts = Checkout.objects.bulk_create([
+                        Checkout(
+                            user=user.customer,
+                            order_id=cart_id,
+                            payment_method=payment_method,
+                            shipping_address=shipping_address,
+                            payment_status='PENDING' if payment_status else 'FAILED',
+                        ) for cart_id in cart_ids
+                    ])
+                    record_sales(cart_ids)
+            except InsufficientStock as exc:
+                return Response(
+                    {"error": "Not enough stock to complete checkout.", "items": exc.shortages},
+                    status=status.HTTP_409_CONFLICT,
                 )
-                checkouts.append(checkout)
-
-                # Update cart status
-                cart.status = 'PENDING'
-                cart.orderstat='PROCESSING'
-                cart.save()
 
+            orders = {
+                order['id']: order
+                for order in Order.objects.filter(pk__in=cart_ids).values('id', 'total_price', 'status')
+            }
             return Response({
                 "message": "Checkout successful.",
                 "checkouts": [
                     {
                         "checkout_id": c.id,
-                        "total_price": c.order.total_price,
-                        "orderstatus": c.order.status,
+                        "total_price": orders[c.order_id]['total_price'],
+                        "orderstatus": orders[c.order_id]['status'],
                         "status": c.payment_status,
                     } for c in checkouts
                 ]
@@ -442,25 +979,40 @@ class CheckoutView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 class CheckoutRetrieveAPIView(APIView):
     """
-    API view to retrieve all checkout details for a user's pending orders.
+    API view to retrieve the checkout details for a user's pending orders,
+    newest first and cursor-paginated. Filters: ``payment_status`` (comma
+    separated), ``created_after`` and ``created_before``.
     """
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
+    keyset_ordering = '-created_at'
 
     def get(self, request, *args, **kwargs):
-        try:
-            # Fetch all PENDING orders for the user
-            orders = Order.objects.filter(user=request.user.customer, orderstat='PROCESSING')
-            if not orders.exists():
-                return Response({"error": "No pending orders found."}, status=status.HTTP_404_NOT_FOUND)
-
-            # Fetch all associated checkouts
-            checkouts = Checkout.objects.filter(order__in=orders)
-            if not checkouts.exists():
-                return Response({"error": "No checkout details found."}, status=status.HTTP_404_NOT_FOUND)
-
-            # Serialize multiple checkouts
-            serializer = CheckoutSerializer(checkouts, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if not hasattr(request.user, 'customer'):
+            return Response({"error": "User is not a customer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Checkouts of the user's PENDING orders, with each order and its
+        # items loaded up front: a page costs the same few queries however
+        # many items it holds.
+        checkouts = (
+            Checkout.objects.filter(order__user=request.user.customer, order__orderstat='PROCESSING')
+            .select_related('order')
+            .prefetch_related(Prefetch(
+                'order__order_items',
+                queryset=OrderItem.objects.select_related('product__vendor', 'product__category').order_by('id'),
+            ))
+        )
+        filterset = CheckoutFilter(request.query_params, queryset=checkouts)
+        if not filterset.is_valid():
+            return Response({"error": filterset.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(filterset.qs, request, view=self)
+        if not page and not paginator.has_previous and not checkouts.exists():
+            # Only a user with no pending checkouts at all; filters that
+            # match nothing get an empty page.
+            return Response({"error": "No checkout details found."}, status=status.HTTP_404_NOT_FOUND)
+
+        # Serialize multiple checkouts
+        serializer = CheckoutSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)